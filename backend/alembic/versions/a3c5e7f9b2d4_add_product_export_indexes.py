@@ -0,0 +1,44 @@
+"""Add product export indexes
+
+Revision ID: a3c5e7f9b2d4
+Revises: 1117d196c298
+Create Date: 2026-10-16 10:12:41.204113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c5e7f9b2d4'
+down_revision: Union[str, Sequence[str], None] = '1117d196c298'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY: products is the big table, don't block scraper writes.
+    with op.get_context().autocommit_block():
+        # CSV/Sheets export filters: site_id + type + last_seen_at range.
+        # INCLUDE only carries id; the text columns would gain nothing (exports read
+        # all 17 columns anyway) and risk the btree tuple size limit on long URLs.
+        op.create_index(
+            'ix_products_site_type_lastseen', 'products',
+            ['site_id', 'type', 'last_seen_at'], unique=False,
+            postgresql_include=['id'], postgresql_concurrently=True,
+        )
+        # Pure last_seen_at range scans, with id as a stable tie-breaker.
+        op.create_index(
+            'ix_products_lastseen_id', 'products', ['last_seen_at', 'id'], unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_products_lastseen_id', table_name='products', postgresql_concurrently=True)
+        op.drop_index('ix_products_site_type_lastseen', table_name='products', postgresql_concurrently=True)
@@ -0,0 +1,73 @@
+"""Store job enums as varchar
+
+Revision ID: b8d1f4a6c3e2
+Revises: a3c5e7f9b2d4
+Create Date: 2026-10-16 11:03:27.581946
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8d1f4a6c3e2'
+down_revision: Union[str, Sequence[str], None] = 'a3c5e7f9b2d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ENUMS = {
+    'jobrun_status': ('queued', 'running', 'done', 'error', 'canceled'),
+    'site_enum': ('rebaid', 'rebatekey', 'myvipon'),
+    'stage_enum': ('urls', 'details'),
+}
+# (table, column, enum type name)
+COLUMNS = [
+    ('job_runs', 'status', 'jobrun_status'),
+    ('job_run_parts', 'site', 'site_enum'),
+    ('job_run_parts', 'stage', 'stage_enum'),
+    ('job_run_parts', 'status', 'jobrun_status'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Native ENUM types only exist on PostgreSQL; elsewhere these are already strings.
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for table, column, enum_name in COLUMNS:
+        op.alter_column(
+            table, column,
+            existing_type=postgresql.ENUM(*ENUMS[enum_name], name=enum_name),
+            type_=sa.String(length=16),
+            existing_nullable=False,
+            postgresql_using=f'{column}::text',
+        )
+    for enum_name in ENUMS:
+        op.execute(f'DROP TYPE IF EXISTS {enum_name}')
+    # keep the values DB-validated: CHECK constraints named like the model's
+    # SAEnum(..., create_constraint=True) emits them
+    for table, column, enum_name in COLUMNS:
+        op.create_check_constraint(
+            enum_name, table, sa.column(column).in_(ENUMS[enum_name])
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for table, column, enum_name in COLUMNS:
+        op.drop_constraint(enum_name, table, type_='check')
+    for enum_name, values in ENUMS.items():
+        postgresql.ENUM(*values, name=enum_name).create(op.get_bind(), checkfirst=True)
+    for table, column, enum_name in COLUMNS:
+        op.alter_column(
+            table, column,
+            existing_type=sa.String(length=16),
+            type_=postgresql.ENUM(*ENUMS[enum_name], name=enum_name, create_type=False),
+            existing_nullable=False,
+            postgresql_using=f'{column}::{enum_name}',
+        )
@@ -0,0 +1,42 @@
+"""Timestamp server defaults
+
+Revision ID: c2e4a6b8d0f1
+Revises: b8d1f4a6c3e2
+Create Date: 2026-10-16 11:41:09.318254
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2e4a6b8d0f1'
+down_revision: Union[str, Sequence[str], None] = 'b8d1f4a6c3e2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, column) pairs whose default moved from Python datetime.utcnow to the DB
+# clock, kept in UTC (models.utcnow) whatever the session TimeZone is
+COLUMNS = [
+    ('jobs', 'created_at'),
+    ('job_runs', 'queued_at'),
+    ('job_events', 'ts'),
+    ('products', 'first_seen_at'),
+    ('products', 'last_seen_at'),
+    ('products', 'created_at'),
+    ('products', 'updated_at'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, column in COLUMNS:
+        op.alter_column(table, column, existing_type=sa.DateTime(), server_default=sa.text("timezone('utc', now())"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, column in COLUMNS:
+        op.alter_column(table, column, existing_type=sa.DateTime(), server_default=None)
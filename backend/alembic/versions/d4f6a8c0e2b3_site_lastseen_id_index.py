@@ -0,0 +1,43 @@
+"""Extend site/last_seen index with id
+
+Revision ID: d4f6a8c0e2b3
+Revises: c2e4a6b8d0f1
+Create Date: 2026-10-16 13:05:18.517204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4f6a8c0e2b3'
+down_revision: Union[str, Sequence[str], None] = 'c2e4a6b8d0f1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Exports filter on site_id and order/seek on (last_seen_at, id); with id in the
+    # key a site export is one backward index range scan, no incremental sort.
+    # CONCURRENTLY: products is the big table, don't block scraper writes.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_products_site_lastseen_id', 'products',
+            ['site_id', 'last_seen_at', 'id'], unique=False,
+            postgresql_concurrently=True,
+        )
+        # (site_id, last_seen_at) is now a prefix of the index above
+        op.drop_index('ix_site_last_seen', table_name='products', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_site_last_seen', 'products', ['site_id', 'last_seen_at'], unique=False,
+            postgresql_concurrently=True,
+        )
+        op.drop_index('ix_products_site_lastseen_id', table_name='products', postgresql_concurrently=True)
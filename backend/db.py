@@ -1,15 +1,64 @@
-from contextlib import asynccontextmanager
-from typing import AsyncGenerator
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import NullPool
 from settings import settings
 
 # SQLAlchemy sync engine (simple + solid for API workloads)
-engine = create_engine(settings.database_url, pool_pre_ping=True)
+if settings.db_behind_pgbouncer:
+    # PgBouncer (transaction mode) owns the pool. Pre-ping would open a transaction
+    # per checkout that pins a server connection, so hand connections straight back.
+    engine = create_engine(
+        settings.database_url,
+        poolclass=NullPool,
+        pool_pre_ping=False,
+    )
+
+    # statement_timeout is set per transaction (SET LOCAL): stock PgBouncer rejects an
+    # `options` startup parameter, and a session-level SET would stick to whichever
+    # server connection ran it. Engines can override it with the `statement_timeout_ms`
+    # execution option (0 = no timeout, e.g. exports below).
+    @event.listens_for(engine, "begin")
+    def _set_statement_timeout(conn):
+        timeout_ms = conn.get_execution_options().get(
+            "statement_timeout_ms", settings.db_statement_timeout_ms
+        )
+        if timeout_ms > 0:
+            conn.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout_ms)}")
+else:
+    # Pool sized explicitly: the defaults (5 + 10 overflow) run dry under concurrent
+    # requests. LIFO keeps the hot connections in use and lets idle ones age out.
+    # No pre-ping (a SELECT 1 round-trip per checkout): dead sockets are caught by
+    # libpq TCP keepalives and pool_recycle instead. DB_POOL_PRE_PING=true restores it.
+    connect_args = {}
+    if settings.database_url.startswith("postgresql"):
+        connect_args = {"keepalives": 1, "keepalives_idle": 30, "keepalives_interval": 10, "keepalives_count": 3}
+    engine = create_engine(
+        settings.database_url,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        connect_args=connect_args,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_use_lifo=True,
+    )
 
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
+# Exports run in one READ ONLY, REPEATABLE READ transaction (same pool): every
+# keyset page / COPY / count of a request reads the same snapshot, so rows that a
+# concurrent scraper upsert moves (last_seen_at = now()) are neither skipped nor
+# repeated. Not AUTOCOMMIT: psycopg2 server-side cursors need a transaction.
+# No statement_timeout: a large COPY export legitimately runs longer than it.
+if engine.dialect.name == "postgresql":
+    export_engine = engine.execution_options(
+        postgresql_readonly=True, isolation_level="REPEATABLE READ", statement_timeout_ms=0
+    )
+else:
+    export_engine = engine
+ExportSessionLocal = sessionmaker(bind=export_engine, autoflush=False, autocommit=False)
+
 class Base(DeclarativeBase):
     pass
 
@@ -19,3 +68,10 @@ def get_session():
         yield db
     finally:
         db.close()
+
+def get_export_session():
+    db = ExportSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
@@ -4,6 +4,13 @@ import asyncio, time, uuid
 from dataclasses import dataclass, asdict
 from typing import Any, Dict, Optional
 
+# Per-job event queue bound: a stalled SSE client keeps at most this many events.
+QUEUE_MAXSIZE = 256
+TERMINAL_EVENTS = ("done", "error", "canceled", "cancelled", "end")
+# Progress coalescing: tick() emits at most one event per N items or T seconds.
+PROGRESS_EVERY_N = 25
+PROGRESS_EVERY_S = 0.25
+
 @dataclass
 class JobState:
     id: str
@@ -23,6 +30,11 @@ class JobManager:
         self.jobs: Dict[str, JobState] = {}
         self.queues: Dict[str, asyncio.Queue] = {}
         self.cancels: Dict[str, asyncio.Event] = {}
+        # cached state dicts for progress events (tick updates them in place)
+        self.snaps: Dict[str, Dict[str, Any]] = {}
+        self.last_push: Dict[str, tuple[int, float]] = {}  # job_id -> (done, monotonic ts)
+        # deadline flush for coalesced progress (one pending timer per job)
+        self.flush_timers: Dict[str, asyncio.TimerHandle] = {}
         self.lock = asyncio.Lock()
 
     def _new_id(self): return uuid.uuid4().hex
@@ -36,7 +48,7 @@ class JobManager:
                 total=total, done=0, ok=0, err=0, note="", meta=meta or {}
             )
             self.jobs[jid] = st
-            self.queues[jid] = asyncio.Queue()
+            self.queues[jid] = asyncio.Queue(maxsize=QUEUE_MAXSIZE)
             self.cancels[jid] = asyncio.Event()
             return st
 
@@ -46,26 +58,68 @@ class JobManager:
     def cancel_event(self, job_id: str) -> Optional[asyncio.Event]:
         return self.cancels.get(job_id)
 
+    def _refresh_snap(self, st: JobState) -> Dict[str, Any]:
+        # full rebuild, only for started/terminal events; meta stays a shared ref
+        snap = asdict(st)
+        snap["meta"] = st.meta
+        self.snaps[st.id] = snap
+        return snap
+
     async def push(self, job_id: str, event: dict):
+        self._push_nowait(job_id, event)
+
+    def _push_nowait(self, job_id: str, event: dict):
+        """
+        Enqueue without blocking the producer. When the queue is full the oldest
+        event is dropped (progress events carry the full state, so newer ones
+        supersede it). Non-terminal events after a job finished are ignored, which
+        keeps terminal events at the tail where they are never dropped.
+        """
         q = self.queues.get(job_id)
-        if q:
-            await q.put(event)
+        if not q:
+            return
+        st = self.jobs.get(job_id)
+        if st and st.status in TERMINAL_EVENTS and event.get("type") not in TERMINAL_EVENTS:
+            return
+        while True:
+            try:
+                q.put_nowait(event)
+                return
+            except asyncio.QueueFull:
+                q.get_nowait()
 
     async def stream(self, job_id: str):
         q = self.queues.get(job_id)
         if not q: return
-        # drain until DONE/ERROR + queue empty
-        while True:
-            event = await q.get()
-            yield event
-            if event.get("type") in ("done", "error", "cancelled") and q.empty():
-                break
+        # drain until the "end" sentinel pushed by finish(); it is not yielded
+        pending: Optional[dict] = None
+        try:
+            while True:
+                event = pending or await q.get()
+                pending = None
+                # a reader that fell behind skips superseded progress snapshots
+                # (each carries the full state); other events are never merged
+                while event.get("type") == "progress" and not q.empty():
+                    nxt = q.get_nowait()
+                    if nxt.get("type") != "progress":
+                        pending = nxt
+                        break
+                    event = nxt
+                if event.get("type") == "end":
+                    break
+                yield event
+        finally:
+            # drained, disconnected or cancelled: drop the per-job queue/event so
+            # push() stops filling a queue nobody reads
+            if self.queues.get(job_id) is q:
+                self.queues.pop(job_id, None)
+                self.cancels.pop(job_id, None)
 
     async def mark_running(self, job_id: str, total: Optional[int] = None):
         st = self.jobs[job_id]
         st.status = "running"
         if total is not None: st.total = total
-        await self.push(job_id, {"type": "started", "state": asdict(st)})
+        await self.push(job_id, {"type": "started", "state": dict(self._refresh_snap(st))})
 
     async def tick(self, job_id: str, *, ok: bool, note: str = "", plus: int = 1, meta: Optional[dict]=None):
         st = self.jobs[job_id]
@@ -74,13 +128,51 @@ class JobManager:
         else: st.err += plus
         if note: st.note = note
         if meta: st.meta.update(meta)
-        await self.push(job_id, {"type": "progress", "state": asdict(st)})
+        snap = self.snaps.get(job_id)
+        if snap is None:  # not started yet / already finished
+            await self.push(job_id, {"type": "progress", "state": asdict(st)})
+            return
+        # coalesce on counts only: at most one event per N items or T seconds; the
+        # latest note rides along with whichever event goes out next
+        now = time.monotonic()
+        last_done, last_ts = self.last_push.get(job_id, (0, 0.0))
+        if st.done - last_done < PROGRESS_EVERY_N and now - last_ts < PROGRESS_EVERY_S:
+            if job_id not in self.flush_timers:
+                # nothing else may tick for a while: send the held state at the deadline
+                self.flush_timers[job_id] = asyncio.get_running_loop().call_later(
+                    PROGRESS_EVERY_S - (now - last_ts), self._flush_progress, job_id
+                )
+            return
+        self._emit_progress(job_id)
+
+    def _flush_progress(self, job_id: str):
+        self.flush_timers.pop(job_id, None)
+        st = self.jobs.get(job_id)
+        if st is None or job_id not in self.snaps:  # finished meanwhile
+            return
+        self._emit_progress(job_id)
+
+    def _emit_progress(self, job_id: str):
+        timer = self.flush_timers.pop(job_id, None)
+        if timer is not None:
+            timer.cancel()
+        st = self.jobs[job_id]
+        snap = self.snaps[job_id]
+        snap["done"], snap["ok"], snap["err"], snap["note"] = st.done, st.ok, st.err, st.note
+        self.last_push[job_id] = (st.done, time.monotonic())
+        self._push_nowait(job_id, {"type": "progress", "state": dict(snap)})
 
     async def finish(self, job_id: str, status: str = "done", note: str = ""):
         st = self.jobs[job_id]
         st.status = status
         st.finished_at = time.time()
         if note: st.note = note
+        # terminal event carries the final counters, flushing any coalesced ticks
         await self.push(job_id, {"type": status, "state": asdict(st)})
+        self.snaps.pop(job_id, None)
+        self.last_push.pop(job_id, None)
+        timer = self.flush_timers.pop(job_id, None)
+        if timer is not None:
+            timer.cancel()
         # close queue
         await self.push(job_id, {"type": "end"})
@@ -1,9 +1,11 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import text
+from sqlalchemy import select, text
 from sqlalchemy.orm import Session
 from db import get_session
-from routers.jobs import router as jobs_router
+from routers.jobs import router as jobs_router, start_tick_writer, stop_tick_writer
 from routers.routers_sites import router as sites_router
 from routers.routers_scrape import router as scrape_router
 from routers.routers_products import router as products_router
@@ -13,8 +15,7 @@ from routers.routers_profile import router as profile_router
 from routers.product_actions import router as product_actions_router
 from routers.metrics import router as metrics_router
 from routers import exports
-
-from fastapi.middleware.cors import CORSMiddleware
+from middleware import SelectiveGZipMiddleware
 
 from jobs.manager import JobManager
 from security import hash_password
@@ -22,28 +23,16 @@ from settings import settings
 from db import SessionLocal
 import models
 from scheduler import build_scheduler, run_daily_pipeline
-from fastapi import BackgroundTasks
 import asyncio
 
-app = FastAPI(title="Scraper API")
 scheduler = build_scheduler()
-resolved_origins = settings.cors_origins or ["http://localhost:3000"]
-allow_credentials = False if resolved_origins == ["*"] else True
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=resolved_origins,
-    allow_credentials=allow_credentials,
-    allow_methods=["*"],
-    allow_headers=["*"],
-    # expose_headers=["X-Total-Count"]  # if you truly need expose, list explicit headers
-)
 
-@app.on_event("startup")
 def ensure_superuser():
     with SessionLocal() as db:
         # if there are no users at all, create the bootstrap superuser (if envs provided)
-        if db.query(models.User).count() == 0:
+        # (LIMIT 1 probe instead of COUNT(*): only emptiness matters)
+        if db.execute(select(models.User.id).limit(1)).first() is None:
             if settings.superuser_email and settings.superuser_password:
                 u = models.User(
                     email=str(settings.superuser_email),
@@ -56,31 +45,45 @@ def ensure_superuser():
                 print(f"[bootstrap] Superuser created: {u.email}")
             else:
                 print("[bootstrap] No users exist and SUPERUSER_* not set. Set envs to create the first superuser.")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    ensure_superuser()
+    # job progress is persisted by a background writer (see routers/jobs.py)
+    start_tick_writer()
     # start scheduler
     if not scheduler.running:
         scheduler.start()
         print("[scheduler] started")
-        # after scheduler.start() in main.py
         for j in scheduler.get_jobs():
             print(f"[scheduler] loaded {j.id} next_run_time={j.next_run_time}")
-
-@app.on_event("shutdown")
-def on_shutdown():
+    yield
     if scheduler.running:
         scheduler.shutdown(wait=False)
         print("[scheduler] stopped")
+    await stop_tick_writer()
+
+
+app = FastAPI(title="Scraper API", lifespan=lifespan)
+resolved_origins = settings.cors_origins or ["http://localhost:3000"]
+allow_credentials = False if resolved_origins == ["*"] else True
+
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=[
-        "http://localhost:3000",
-        "http://127.0.0.1:3000",
-        "http://89.116.157.224:3000",   
-
-    ],
-    allow_credentials=True,
+    allow_origins=resolved_origins,
+    allow_credentials=allow_credentials,
     allow_methods=["*"],
     allow_headers=["*"],
+    # expose_headers=["X-Total-Count"]  # if you truly need expose, list explicit headers
 )
+# CSV exports are very repetitive text; compress anything over 1 KiB.
+# (Starlette skips text/event-stream, so the job SSE stream is unaffected.)
+# .csv.gz downloads are already compressed and bypass it (exports.is_gzip_download).
+app.add_middleware(
+    SelectiveGZipMiddleware, skip=exports.is_gzip_download, minimum_size=1024, compresslevel=6
+)
+
 app.include_router(profile_router)
 app.include_router(exports.router)
 app.include_router(sites_router)
@@ -115,8 +118,13 @@ def _debug_scheduler_jobs():
         for j in scheduler.get_jobs()
     ]
 
+_DEBUG_TASKS: set[asyncio.Task] = set()
+
 @app.post("/_debug/scheduler/run-now")
-async def _debug_scheduler_run_now(background: BackgroundTasks):
-    # do not block the request; run in background
-    background.add_task(run_daily_pipeline)
-    return {"queued": True}
\ No newline at end of file
+async def _debug_scheduler_run_now():
+    # do not block the request; run_daily_pipeline is async, so detach it on the loop
+    # (BackgroundTasks would keep this request's cycle open for the whole pipeline)
+    task = asyncio.create_task(run_daily_pipeline())
+    _DEBUG_TASKS.add(task)  # keep a reference until it finishes
+    task.add_done_callback(_DEBUG_TASKS.discard)
+    return {"queued": True}
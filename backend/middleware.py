@@ -0,0 +1,24 @@
+# middleware.py
+from typing import Callable
+
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class SelectiveGZipMiddleware:
+    """
+    GZipMiddleware, except for requests that `skip(scope)` marks as answered with
+    an already-compressed body (e.g. a .csv.gz download): those bypass it
+    entirely, so the file is never gzipped a second time on the wire.
+    """
+
+    def __init__(self, app: ASGIApp, *, skip: Callable[[Scope], bool], **gzip_options) -> None:
+        self.app = app
+        self.gzip = GZipMiddleware(app, **gzip_options)
+        self.skip = skip
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and self.skip(scope):
+            await self.app(scope, receive, send)
+        else:
+            await self.gzip(scope, receive, send)
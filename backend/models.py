@@ -2,13 +2,37 @@ from sqlalchemy import (
     String, Integer, Boolean, DateTime, ForeignKey, Text, Numeric,
     UniqueConstraint, Index,func, JSON
 )
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import Mapped, mapped_column, relationship, backref
+from sqlalchemy.sql.functions import FunctionElement
 from datetime import datetime
 from decimal import Decimal
 from db import Base
 from enum import Enum
 from sqlalchemy import Enum as SAEnum  # <-- use SQLAlchemy's Enum
 
+
+class utcnow(FunctionElement):
+    """
+    DB-clock "now" as naive UTC, matching the datetime.utcnow() values the app
+    writes itself (started_at, JobEvent.ts, ...). Plain now() on a naive column
+    would be in the session TimeZone instead.
+    """
+    type = DateTime()
+    inherit_cache = True
+
+
+@compiles(utcnow, "postgresql")
+def _pg_utcnow(element, compiler, **kw):
+    return "timezone('utc', now())"
+
+
+@compiles(utcnow)
+def _default_utcnow(element, compiler, **kw):
+    # SQLite's CURRENT_TIMESTAMP is already UTC
+    return "CURRENT_TIMESTAMP"
+
+
 class Job(Base):
     __tablename__ = "jobs"
     __table_args__ = (UniqueConstraint("name", name="uq_jobs_name"),)
@@ -17,19 +41,25 @@ class Job(Base):
     name: Mapped[str] = mapped_column(String(200), index=True)  # e.g. "prep_full_fresh_run"
     schedule_cron: Mapped[str] = mapped_column(String(100), default="")
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=utcnow())
 
+# Stored as VARCHAR (native_enum=False) + a CHECK constraint named after the enum
+# (create_constraint=True), so values stay DB-validated. Adding a value means
+# replacing that CHECK in a migration, not ALTER TYPE ... ADD VALUE on PostgreSQL.
 jobrun_status = SAEnum(
     "queued", "running", "done", "error", "canceled",
-    name="jobrun_status", validate_strings=True
+    name="jobrun_status", validate_strings=True, native_enum=False, length=16,
+    create_constraint=True,
 )
 site_enum = SAEnum(
     "rebaid", "rebatekey", "myvipon",
-    name="site_enum", validate_strings=True
+    name="site_enum", validate_strings=True, native_enum=False, length=16,
+    create_constraint=True,
 )
 stage_enum = SAEnum(
     "urls", "details",
-    name="stage_enum", validate_strings=True
+    name="stage_enum", validate_strings=True, native_enum=False, length=16,
+    create_constraint=True,
 )
 
 class JobRun(Base):
@@ -39,7 +69,7 @@ class JobRun(Base):
     job_id: Mapped[int] = mapped_column(ForeignKey("jobs.id", ondelete="CASCADE"), index=True)
     status: Mapped[str] = mapped_column(jobrun_status, default="queued", index=True)
 
-    queued_at:   Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    queued_at:   Mapped[datetime] = mapped_column(DateTime, server_default=utcnow())
     started_at:  Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     finished_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
 
@@ -80,7 +110,7 @@ class JobEvent(Base):
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     run_id: Mapped[int] = mapped_column(ForeignKey("job_runs.id", ondelete="CASCADE"), index=True)
-    ts: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
+    ts: Mapped[datetime] = mapped_column(DateTime, server_default=utcnow(), index=True)
     level: Mapped[str] = mapped_column(String(10), default="info")
     message: Mapped[str] = mapped_column(String(400), default="")
     plus: Mapped[int] = mapped_column(Integer, default=0)  # processed delta
@@ -121,10 +151,11 @@ class Product(Base):
     external_id: Mapped[str | None] = mapped_column(String(64), index=True, nullable=True)
 
     # timestamps (keep system timestamps non-null with defaults)
-    first_seen_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
-    last_seen_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
-    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # generated by the DB clock: bulk inserts don't bind a Python datetime per column
+    first_seen_at: Mapped[datetime] = mapped_column(DateTime, server_default=utcnow(), index=True)
+    last_seen_at: Mapped[datetime] = mapped_column(DateTime, server_default=utcnow(), onupdate=utcnow(), index=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=utcnow())
+    updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=utcnow(), onupdate=utcnow())
 
     site: Mapped["Site"] = relationship(back_populates="products")
 
@@ -132,7 +163,11 @@ class Product(Base):
         # Unique product_url covers dedupe between stage 1 & 2
         UniqueConstraint("product_url", name="uq_products_url"),
         # Helpful indexes
-        Index("ix_site_last_seen", "site_id", "last_seen_at"),
+        # Export filters (see routers/exports.py)
+        Index("ix_products_site_lastseen_id", "site_id", "last_seen_at", "id"),
+        Index("ix_products_site_type_lastseen", "site_id", "type", "last_seen_at",
+              postgresql_include=["id"]),
+        Index("ix_products_lastseen_id", "last_seen_at", "id"),
     )
 class User(Base):
     __tablename__ = "users"
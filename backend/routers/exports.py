@@ -1,27 +1,44 @@
 # routers/exports.py
 from __future__ import annotations
 
+import asyncio
 import csv
+import gzip
 import json
 import logging
 import random
 import re
+import threading
 import time
-from datetime import datetime, time as dtime
+import zlib
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import date, datetime, time as dtime
+from functools import lru_cache
+from itertools import chain
 from io import StringIO
+from queue import Full, Queue
 from typing import Iterable, List, Optional, Literal, Iterator, Tuple
+from urllib.parse import parse_qs
 
+import anyio
 from fastapi import APIRouter, Depends, HTTPException, Query, Body
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
-from sqlalchemy import and_
+from sqlalchemy import Integer, and_, any_, func, literal, select, tuple_
+from sqlalchemy.dialects.postgresql import ARRAY as PG_ARRAY
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import Session
 
-from db import get_session
+from db import get_export_session
 import models
 from security import get_current_user
 from settings import settings
 
+try:
+    import orjson  # type: ignore
+except ImportError:  # optional; stdlib json fallback
+    orjson = None
+
 # Google API errors type (used by retry helpers)
 try:
     from googleapiclient.errors import HttpError  # type: ignore
@@ -40,6 +57,10 @@ CSV_FIELDS = [
     "first_seen_at", "last_seen_at", "created_at", "updated_at",
 ]
 
+# Core columns selected for exports, in CSV_FIELDS order. Selecting plain
+# columns skips ORM instance construction (identity map, instrumentation).
+PRODUCT_COLS = tuple(getattr(models.Product, f) for f in CSV_FIELDS)
+
 # -------------------------------------------------------------------
 # Helpers
 # -------------------------------------------------------------------
@@ -48,26 +69,72 @@ def _parse_date_bound(s: Optional[str], *, end: bool = False) -> Optional[dateti
         return None
     try:
         if len(s) == 10:  # YYYY-MM-DD
-            d = datetime.strptime(s, "%Y-%m-%d").date()
+            d = date.fromisoformat(s)  # C parser, no strptime
             return datetime.combine(d, dtime.max if end else dtime.min)
         return datetime.fromisoformat(s)
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD or ISO-8601.")
 
 
-def _row_from_product(p: models.Product) -> List[str]:
-    def dt(v): return v.isoformat(timespec="seconds") if v else ""
-    def s(v): return "" if v is None else str(v)
+_isoformat = datetime.isoformat
+
+# isoformat(timespec=...) costs ~1.5 µs a call and export timestamps repeat a lot
+# (last_seen_at is stamped per scrape run), so format each distinct value once.
+_TS_CACHE_MAX = 65536
+_ts_cache: dict = {}
+
+
+def _ts(v: Optional[datetime]) -> str:
+    if v is None:
+        return ""
+    s = _ts_cache.get(v)
+    if s is None:
+        if len(_ts_cache) >= _TS_CACHE_MAX:
+            _ts_cache.clear()
+        s = _ts_cache[v] = _isoformat(v, timespec="seconds")
+    return s
+
+
+def _row_from_tuple(r: Row) -> List[str]:
+    """
+    Format a PRODUCT_COLS row (plain tuple, no ORM object) as CSV/Sheets cells.
+    Conversions are inlined except timestamps (memoized _ts): text columns are
+    already str, price is Numeric(12, 2) so "{:.2f}" matches str(Decimal).
+    """
+    (pid, site_id, product_url, type_, title, price, image_url, description,
+     category, amazon_url, store_url, store_name, external_id,
+     first_seen, last_seen, created, updated) = r
     return [
-        s(p.id), s(p.site_id), s(p.product_url), s(p.type), s(p.title), s(p.price),
-        s(p.image_url), s(p.description), s(p.category), s(p.amazon_url),
-        s(p.amazon_store_url), s(p.amazon_store_name), s(p.external_id),
-        dt(p.first_seen_at), dt(p.last_seen_at), dt(p.created_at), dt(p.updated_at),
+        str(pid), str(site_id), product_url or "", type_ or "", title or "",
+        f"{price:.2f}" if price is not None else "",
+        image_url or "", description or "", category or "", amazon_url or "",
+        store_url or "", store_name or "", external_id or "",
+        _ts(first_seen), _ts(last_seen), _ts(created), _ts(updated),
     ]
 
 
-def _base_query(db: Session):
-    return db.query(models.Product)
+_ids_rx = re.compile(r"\s*(?:\d+\s*)?(?:,\s*(?:\d+\s*)?)*", re.ASCII)
+_id_rx = re.compile(r"\d+", re.ASCII)
+
+
+def _parse_ids(ids: str) -> List[int]:
+    """
+    Parse "1, 2,3,2" -> [1, 2, 3]; validate + split in C rather than per-element Python.
+    A present but empty selection ("", ",", " , ") is a 400, never "no id filter".
+    """
+    if _ids_rx.fullmatch(ids) is None:
+        raise HTTPException(status_code=400, detail="ids must be comma-separated integers")
+    parsed = list(dict.fromkeys(map(int, _id_rx.findall(ids))))  # dedupe, keep order
+    if not parsed:
+        raise HTTPException(status_code=400, detail="ids must contain at least one id")
+    return parsed
+
+
+IDS_ARRAY_MIN = 1000
+
+
+def _base_query():
+    return select(*PRODUCT_COLS)
 
 
 def _apply_filters(
@@ -80,9 +147,12 @@ def _apply_filters(
     last_seen_from: Optional[str],
     last_seen_to: Optional[str],
     limit: Optional[int],
+    ids_as_array: bool = False,
 ):
     """
     Filter-only helper. No ordering here; ordering is applied in the endpoint.
+    ids_as_array (Postgres): send a long id list as one array param, `id = ANY(:ids)`,
+    instead of an IN list expanded to one bind per id.
     """
     if site:
         q = q.join(models.Site).filter(models.Site.name == site)
@@ -91,7 +161,12 @@ def _apply_filters(
     if type_:
         q = q.filter(models.Product.type == type_)
     if selected_ids:
-        q = q.filter(models.Product.id.in_(selected_ids))
+        if len(selected_ids) == 1:
+            q = q.filter(models.Product.id == selected_ids[0])  # plain PK equality
+        elif ids_as_array and len(selected_ids) > IDS_ARRAY_MIN:
+            q = q.filter(models.Product.id == any_(literal(selected_ids, PG_ARRAY(Integer))))
+        else:
+            q = q.filter(models.Product.id.in_(selected_ids))
 
     start_dt = _parse_date_bound(last_seen_from, end=False)
     end_dt = _parse_date_bound(last_seen_to, end=True)
@@ -111,17 +186,271 @@ def _apply_filters(
     return q
 
 
-def _stream_csv(rows: Iterable[models.Product]) -> Iterable[str]:
+_unsafe_filename_rx = re.compile(r"[^\w.\-]", re.ASCII)
+
+
+def _safe_filename(name: Optional[str]) -> str:
+    """Client-supplied download name, reduced to [A-Za-z0-9_.-] for the header."""
+    return _unsafe_filename_rx.sub("_", name.strip())[:120] if name and name.strip() else ""
+
+
+# "\n" like Postgres COPY ... CSV, so every export path ends rows the same way
+CSV_LINETERMINATOR = "\n"
+CSV_BATCH_ROWS = 500          # rows per writerows() call
+CSV_FLUSH_BYTES = 64 * 1024   # yield once the buffer grows past this
+
+
+# sort name -> (key columns, descending); id breaks last_seen_at ties.
+# "none" -> no key columns: the caller may skip ORDER BY entirely (DB order).
+# last_seen_* + LIMIT is served by ix_products_lastseen_id (last_seen_at, id).
+_SORT_KEYS = {
+    "last_seen_desc": ((models.Product.last_seen_at, models.Product.id), True),
+    "last_seen_asc": ((models.Product.last_seen_at, models.Product.id), False),
+    "id_asc": ((models.Product.id,), False),
+    "id_desc": ((models.Product.id,), True),
+    "none": ((), False),
+}
+SORT_CHOICES = "|".join(_SORT_KEYS)
+
+
+def _sort_keys(sort: Optional[str]) -> Tuple[Tuple, bool]:
+    """(key columns, descending) for the export sort; unknown values -> id_asc."""
+    return _SORT_KEYS.get((sort or "").lower(), _SORT_KEYS["id_asc"])
+
+
+def _order_by(q, sort: Optional[str]):
+    cols, desc = _sort_keys(sort)
+    return q.order_by(*(c.desc() if desc else c.asc() for c in cols)) if cols else q
+
+
+def _keyset_pages(db: Session, q, *, sort: Optional[str], limit: Optional[int],
+                  page_rows: int = CSV_BATCH_ROWS) -> Iterator[List[Row]]:
+    """
+    Seek pagination over a filtered (unordered, unlimited) select: each page is a
+    short query `WHERE (keys) < (last keys) ORDER BY keys LIMIT n`, so every page
+    is an index range and no server-side cursor stays open between pages. All
+    pages run in the caller's session transaction; consistency across pages
+    relies on the export session's REPEATABLE READ snapshot (db.export_engine),
+    since last_seen_at keys move under concurrent upserts.
+    """
+    cols, desc = _sort_keys(sort)
+    cols = cols or (models.Product.id,)  # seeking needs a key; PK order is an index walk
+    key = tuple_(*cols) if len(cols) > 1 else cols[0]
+    q = q.order_by(*(c.desc() if desc else c.asc() for c in cols))
+    names = [c.key for c in cols]
+    last = None
+    remaining = limit
+    while remaining is None or remaining > 0:
+        page_q = q
+        if last is not None:
+            page_q = page_q.where(key < last if desc else key > last)
+        n = page_rows if remaining is None else min(page_rows, remaining)
+        rows = db.execute(page_q.limit(n)).all()
+        if not rows:
+            return
+        yield rows
+        if len(rows) < n:
+            return
+        tail = rows[-1]
+        last = tuple_(*(getattr(tail, k) for k in names)) if len(names) > 1 else getattr(tail, names[0])
+        if remaining is not None:
+            remaining -= len(rows)
+
+
+def _fetch_by_ids_in_order(db: Session, q, selected_ids: List[int],
+                           limit: Optional[int] = None) -> List[Row]:
+    """
+    Rows of an explicit id selection, in the order the ids were given. `q` already
+    carries the `id IN (...)` filter, so this is a PK index lookup with no ORDER BY.
+    """
+    by_id = {r[0]: r for r in db.execute(q)}
+    rows = [by_id[i] for i in selected_ids if i in by_id]
+    return rows[:limit] if limit else rows
+
+
+def _stream_csv(pages: Iterable[List[Row]]) -> Iterable[bytes]:
+    """
+    Batched CSV stream: each page of rows is written with one writerows() call,
+    and the buffer is yielded only once it passes CSV_FLUSH_BYTES, so large
+    exports send a few hundred chunks instead of one per row. Chunks are
+    encoded here, once each, so Starlette passes them through as-is.
+    """
     buf = StringIO()
-    writer = csv.writer(buf)
+    writer = csv.writer(buf, lineterminator=CSV_LINETERMINATOR)
     writer.writerow(CSV_FIELDS)
-    yield buf.getvalue()
-    buf.seek(0); buf.truncate(0)
 
-    for p in rows:
-        writer.writerow(_row_from_product(p))
-        yield buf.getvalue()
-        buf.seek(0); buf.truncate(0)
+    for part in pages:
+        writer.writerows(map(_row_from_tuple, part))
+        if buf.tell() >= CSV_FLUSH_BYTES:
+            yield buf.getvalue().encode("utf-8")
+            buf.seek(0); buf.truncate(0)
+
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")
+
+def _gzip_stream(chunks: Iterable[bytes]) -> Iterable[bytes]:
+    """
+    Incrementally gzip a byte stream into a .gz file body. Level 1: CSV text
+    still shrinks several-fold while compression stays far ahead of the network.
+    """
+    co = zlib.compressobj(1, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+    for chunk in chunks:
+        out = co.compress(chunk)
+        if out:
+            yield out
+    yield co.flush()
+
+
+CSV_PREFETCH_CHUNKS = 8       # chunks buffered ahead of a slow client (~512 KiB)
+_DONE = object()
+
+
+async def _prefetch(chunks: Iterable[bytes], maxsize: int = CSV_PREFETCH_CHUNKS):
+    """
+    Producer/consumer bridge for a blocking chunk iterator: a task pulls chunks on
+    a worker thread into a bounded queue, so the DB cursor drains at DB speed up
+    to `maxsize` chunks ahead of the client. On client disconnect StreamingResponse
+    cancels us; the producer is cancelled too and the iterator closed (cursor freed).
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize)
+    it = iter(chunks)
+
+    async def produce():
+        try:
+            while True:
+                chunk = await anyio.to_thread.run_sync(next, it, _DONE)
+                await queue.put(chunk)
+                if chunk is _DONE:
+                    return
+        except Exception as e:
+            await queue.put(e)
+        finally:
+            close = getattr(it, "close", None)
+            if close is not None:
+                with anyio.CancelScope(shield=True):
+                    await anyio.to_thread.run_sync(close)
+
+    task = asyncio.create_task(produce())
+    try:
+        while True:
+            item = await queue.get()
+            if item is _DONE:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        task.cancel()
+
+# ------------------ POSTGRES COPY FAST PATH -------------------------
+# Same columns as PRODUCT_COLS, but timestamps are formatted by the server so
+# COPY output matches _row_from_tuple (isoformat, seconds precision).
+_PG_TS_FORMAT = 'YYYY-MM-DD"T"HH24:MI:SS'
+_PG_COPY_COLS = tuple(
+    func.to_char(c, _PG_TS_FORMAT).label(c.key) if c.key.endswith("_at") else c
+    for c in PRODUCT_COLS
+)
+PG_COPY_CHUNK = 64 * 1024
+
+
+class _CopyPipe:
+    """
+    File object for psycopg2's copy_expert, which only writes COPY data into a
+    file: write() coalesces it into PG_COPY_CHUNK pieces and hands them to the
+    reader through a bounded queue, so the first bytes go out while COPY is still
+    running. Once the reader is gone (abandon()), writes are dropped.
+    """
+
+    def __init__(self, maxsize: int = CSV_PREFETCH_CHUNKS):
+        self.queue: Queue = Queue(maxsize)
+        self._pending = bytearray()
+        self._abandoned = threading.Event()
+
+    def _put(self, item) -> None:
+        while not self._abandoned.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                return
+            except Full:
+                continue
+
+    def write(self, data: bytes) -> None:
+        if self._abandoned.is_set():
+            return
+        self._pending += data
+        if len(self._pending) >= PG_COPY_CHUNK:
+            self._put(bytes(self._pending))
+            self._pending.clear()
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        if error is None and self._pending:
+            self._put(bytes(self._pending))
+        self._put(_DONE if error is None else error)
+
+    def abandon(self) -> None:
+        self._abandoned.set()
+
+
+def _stream_pg_copy(db: Session, q) -> Iterable[bytes]:
+    """
+    Let Postgres render the CSV itself via COPY (...) TO STDOUT WITH CSV HEADER.
+    psycopg 3 streams COPY data as it arrives; psycopg2's copy_expert blocks until
+    COPY ends, so it runs on its own thread and feeds us through a _CopyPipe.
+    """
+    stmt = q.with_only_columns(*_PG_COPY_COLS)
+    # COPY takes no server-side parameters: compile with placeholders and let the
+    # driver merge the values client-side (no literal_binds, whose pyformat
+    # escaping would leave "%%" inside string literals).
+    compiled = stmt.compile(db.get_bind())
+    copy_sql = f"COPY ({compiled}) TO STDOUT WITH CSV HEADER"
+    params = compiled.params
+
+    raw = db.connection().connection.dbapi_connection
+    cur = raw.cursor()
+    try:
+        if hasattr(cur, "copy_expert"):  # psycopg2
+            pipe = _CopyPipe()
+            sql = cur.mogrify(copy_sql, params)  # bytes SQL is accepted
+
+            def run():
+                try:
+                    cur.copy_expert(sql, pipe)
+                except BaseException as e:
+                    pipe.finish(e)
+                else:
+                    pipe.finish()
+
+            copier = threading.Thread(target=run, name="pg-copy", daemon=True)
+            copier.start()
+            try:
+                while True:
+                    item = pipe.queue.get()
+                    if item is _DONE:
+                        break
+                    if isinstance(item, BaseException):
+                        raise item
+                    yield item
+            finally:
+                # Client gone (or error): stop feeding, cancel the COPY server-side
+                # and wait for the thread before the connection goes back to the session.
+                pipe.abandon()
+                if copier.is_alive():
+                    raw.cancel()
+                copier.join()
+        else:  # psycopg 3
+            # COPY delivers roughly one message per row; coalesce them so each
+            # threadpool hop in StreamingResponse moves ~64 KiB, not one row.
+            pending = bytearray()
+            with cur.copy(copy_sql, params) as copy:
+                for chunk in copy:
+                    pending += chunk
+                    if len(pending) >= PG_COPY_CHUNK:
+                        yield bytes(pending)
+                        pending.clear()
+            if pending:
+                yield bytes(pending)
+    finally:
+        cur.close()
 
 # -------------------------------------------------------------------
 # CSV endpoints
@@ -132,7 +461,7 @@ def _stream_csv(rows: Iterable[models.Product]) -> Iterable[str]:
     dependencies=[Depends(get_current_user)],
 )
 def export_products_csv(
-    db: Session = Depends(get_session),
+    db: Session = Depends(get_export_session),
     site: Optional[str] = Query(None, description="Filter by site name (models.Site.name)"),
     site_id: Optional[int] = Query(None, description="Filter by site id"),
     last_seen_from: Optional[str] = Query(None, description="YYYY-MM-DD or ISO-8601"),
@@ -141,68 +470,96 @@ def export_products_csv(
     id: Optional[int] = Query(None, description="Export a single product by id"),
     ids: Optional[str] = Query(None, description="Comma-separated product ids, e.g. 1,2,3"),
     limit: Optional[int] = Query(None, ge=1, le=200000, description="Limit number of rows"),
-    sort: Optional[str] = Query("last_seen_desc", description="last_seen_desc|last_seen_asc"),
+    sort: Optional[str] = Query("last_seen_desc", description=SORT_CHOICES),
+    filename: Optional[str] = Query(None, description="Download file name (default products_<epoch>.csv)"),
+    compress: Optional[Literal["gzip"]] = Query(None, description="gzip: download a .csv.gz file"),
 ):
     # Selection handling
     selected_ids: List[int] = []
     if id is not None:
         selected_ids = [id]
-    elif ids:
-        try:
-            selected_ids = [int(x.strip()) for x in ids.split(",") if x.strip()]
-        except ValueError:
-            raise HTTPException(status_code=400, detail="ids must be comma-separated integers")
+    elif ids is not None:
+        selected_ids = _parse_ids(ids)
 
-    # Build the query with filters only
+    # Build the query with filters only (ordering/limit depend on the path below).
+    # An explicit id selection skips the date range and sort: ids keep input order.
     q = _apply_filters(
-        _base_query(db),
+        _base_query(),
         site=site, site_id=site_id, type_=type,
         selected_ids=selected_ids,
-        last_seen_from=last_seen_from, last_seen_to=last_seen_to,
-        limit=limit,
+        last_seen_from=None if selected_ids else last_seen_from,
+        last_seen_to=None if selected_ids else last_seen_to,
+        limit=None,
+        ids_as_array=db.get_bind().dialect.name == "postgresql",
     )
 
-    # Apply sorting once
-    s = (sort or "").lower()
-    if s == "last_seen_desc":
-        q = q.order_by(models.Product.last_seen_at.desc())
-    elif s == "last_seen_asc":
-        q = q.order_by(models.Product.last_seen_at.asc())
-    else:
-        q = q.order_by(models.Product.id.asc())
-
-    rows = q.yield_per(1000)
+    filename = _safe_filename(filename) or f"products_{int(time.time())}.csv"
 
-    timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-    filename = f"products_{timestamp}.csv"
-    return StreamingResponse(
-        _stream_csv(rows),
-        media_type="text/csv",
-        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
-    )
+    # small: the whole result is already in hand, so send one plain body
+    # (Content-Length, no prefetch task / per-chunk thread hops)
+    small = True
+    if selected_ids:
+        body = _stream_csv([_fetch_by_ids_in_order(db, q, selected_ids, limit)])
+    elif db.get_bind().dialect.name == "postgresql":
+        # single COPY statement: order + limit in SQL
+        q = _order_by(q, sort)
+        if limit:
+            q = q.limit(limit)
+        body = _stream_pg_copy(db, q)
+        small = False
+    else:
+        pages = _keyset_pages(db, q, sort=sort, limit=limit)
+        first = next(pages, [])
+        small = len(first) < CSV_BATCH_ROWS  # a short first page is the last one
+        body = _stream_csv(chain([first], pages))
+
+    # Plain CSV is gzipped on the wire by the gzip middleware (main.py) when the
+    # client accepts it. A .gz download is already compressed: is_gzip_download()
+    # makes the middleware skip this request instead of gzipping it a second time.
+    media_type = "text/csv"
+    if compress == "gzip":
+        body = _gzip_stream(body)
+        media_type = "application/gzip"
+        if not filename.endswith(".gz"):
+            filename += ".gz"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+
+    if small:
+        return Response(b"".join(body), media_type=media_type, headers=headers)
+
+    # Every next() on `body` is a blocking DB fetch: pull (64 KiB) chunks on a
+    # worker thread, a few ahead of the client, so the event loop stays free.
+    return StreamingResponse(_prefetch(body), media_type=media_type, headers=headers)
+
+
+def is_gzip_download(scope) -> bool:
+    """True for GET /exports/products.csv?compress=gzip (body is already a .gz file)."""
+    if scope.get("path") != router.prefix + "/products.csv":
+        return False
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    return "gzip" in query.get("compress", ())
 
 
 @router.get(
     "/products/{product_id}.csv",
-    response_class=StreamingResponse,
+    response_class=Response,
     dependencies=[Depends(get_current_user)],
 )
-def export_single_product_csv(product_id: int, db: Session = Depends(get_session)):
-    p = db.query(models.Product).filter(models.Product.id == product_id).first()
-    if not p:
+def export_single_product_csv(product_id: int, db: Session = Depends(get_export_session)):
+    # primary-key lookup of the export columns; one row, so build the body in one go
+    p = db.execute(_base_query().where(models.Product.id == product_id)).one_or_none()
+    if p is None:
         raise HTTPException(status_code=404, detail="Product not found")
 
-    def one():
-        buf = StringIO()
-        w = csv.writer(buf)
-        w.writerow(CSV_FIELDS)
-        w.writerow(_row_from_product(p))
-        yield buf.getvalue()
+    buf = StringIO()
+    w = csv.writer(buf, lineterminator=CSV_LINETERMINATOR)
+    w.writerow(CSV_FIELDS)
+    w.writerow(_row_from_tuple(p))
 
     timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
     filename = f"product_{product_id}_{timestamp}.csv"
-    return StreamingResponse(
-        one(),
+    return Response(
+        buf.getvalue().encode("utf-8"),
         media_type="text/csv",
         headers={"Content-Disposition": f'attachment; filename="{filename}"'}
     )
@@ -221,7 +578,13 @@ def _load_service_account_creds():
     raw = getattr(settings, "google_service_account_json", None)
     if not raw:
         raise HTTPException(status_code=500, detail="GOOGLE_SERVICE_ACCOUNT_JSON is not set")
+    return _creds_from_raw(raw)
+
 
+@lru_cache(maxsize=1)
+def _creds_from_raw(raw: str):
+    # Cached per raw setting value; the token is refreshed in place by google-auth.
+    # Failures raise, so they are not cached.
     try:
         from google.oauth2.service_account import Credentials  # type: ignore
     except ImportError:
@@ -242,8 +605,48 @@ def _load_service_account_creds():
         raise HTTPException(status_code=500, detail=f"Invalid service account JSON: {e}")
 
 
+SHEETS_GZIP_MIN_BYTES = 16 * 1024
+
+
+def _json_dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+
+def _fast_json_model():
+    """JsonModel whose request bodies are serialized with orjson (values payloads are large)."""
+    from googleapiclient.model import JsonModel  # type: ignore
+
+    class _FastJsonModel(JsonModel):
+        def serialize(self, body_value):
+            if isinstance(body_value, dict) and "data" not in body_value and self._data_wrapper:
+                body_value = {"data": body_value}
+            return _json_dumps(body_value)
+
+        def request(self, headers, path_params, query_params, body_value):
+            headers, path_params, query, body = super().request(
+                headers, path_params, query_params, body_value
+            )
+            # values payloads are repetitive strings; gzip shrinks the upload several-fold
+            if body and settings.sheets_gzip_requests and len(body) >= SHEETS_GZIP_MIN_BYTES:
+                body = gzip.compress(body, compresslevel=1)
+                headers["content-encoding"] = "gzip"
+            return headers, path_params, query, body
+
+    return _FastJsonModel(data_wrapper=False)
+
+
+# Service objects wrap an httplib2.Http, which is not thread-safe, so we keep
+# one per worker thread instead of one per process.
+_sheets_local = threading.local()
+
+
 def _get_sheets_service(creds):
     """Lazy import the Sheets client to avoid import errors at app start."""
+    svc = getattr(_sheets_local, "service", None)
+    if svc is not None and getattr(_sheets_local, "creds", None) is creds:
+        return svc
     try:
         from googleapiclient.discovery import build  # type: ignore
     except ImportError:
@@ -252,7 +655,14 @@ def _get_sheets_service(creds):
             detail="Google Sheets export requires 'google-api-python-client'. "
                    "Install it: pip install google-api-python-client",
         )
-    return build("sheets", "v4", credentials=creds, cache_discovery=False)
+    # static_discovery: use the bundled discovery doc, no network round-trip
+    svc = build(
+        "sheets", "v4", credentials=creds, cache_discovery=False, static_discovery=True,
+        model=_fast_json_model(),
+    )
+    _sheets_local.service = svc
+    _sheets_local.creds = creds
+    return svc
 
 
 def _col_letter(n: int) -> str:
@@ -263,22 +673,21 @@ def _col_letter(n: int) -> str:
     return s
 
 
+LAST_COL_LETTER = _col_letter(len(CSV_FIELDS))  # "Q" for the 17 export columns
+
+
+_a1_cell_rx = re.compile(r"\s*([A-Za-z]+)(\d+)\s*", re.ASCII)
+
+
 def _parse_a1_cell(cell: str) -> Tuple[int, str]:
     """
     Parse an A1 cell like 'B3' -> (row=3, col_letter='B').
     Defaults to (1, 'A') if parsing fails.
     """
-    try:
-        m = re.match(r"^\s*([A-Za-z]+)(\d+)\s*$", cell or "")
-        if not m:
-            return 1, "A"
-        col_letters = m.group(1).upper()
-        row_num = int(m.group(2))
-        if row_num < 1:
-            row_num = 1
-        return row_num, col_letters
-    except Exception:
+    m = _a1_cell_rx.fullmatch(cell or "")
+    if not m:
         return 1, "A"
+    return max(int(m.group(2)), 1), m.group(1).upper()
 
 # ------------------ RETRYABLE SHEETS OPS (avoid 500s) -------------------------
 def _retryable(exc: Exception) -> bool:
@@ -339,35 +748,38 @@ def _clear_tab(service, spreadsheet_id: str, title: str, last_col_letter: str) -
 def _write_chunk(service, spreadsheet_id: str, title: str, start_cell_a1: str, rows2d: List[List[str]]):
     body = {
         "valueInputOption": "RAW",
+        "includeValuesInResponse": False,
         "data": [{
             "range": f"{title}!{start_cell_a1}",
             "majorDimension": "ROWS",
             "values": rows2d,
         }],
     }
+    # fields: the per-range update summary isn't used; ask for the smallest reply
     _exec_with_retry(lambda: service.spreadsheets().values().batchUpdate(
-        spreadsheetId=spreadsheet_id, body=body
+        spreadsheetId=spreadsheet_id, body=body, fields="totalUpdatedRows"
     ).execute())
 
 
 def _get_last_non_empty_row(service, spreadsheet_id: str, title: str) -> int:
     """
-    Returns the last non-empty row index by scanning column A.
+    Returns the last non-empty row index by scanning column A (the export's id
+    column). The reply lists every row up to the last non-empty one, gaps
+    included, so its length is the true end even with blank rows in between.
     If there is no data at all, returns 0.
     """
     resp = _exec_with_retry(lambda: service.spreadsheets().values().get(
         spreadsheetId=spreadsheet_id,
-        range=f"{title}!A:A"
+        range=f"{title}!A:A",
+        fields="values",
     ).execute())
-    values = resp.get("values", [])
-    return len(values)  # number of non-empty rows in col A
+    return len(resp.get("values", []))
 
 
 def _header_exists(service, spreadsheet_id: str, title: str) -> bool:
-    col = _col_letter(len(CSV_FIELDS))
     resp = _exec_with_retry(lambda: service.spreadsheets().values().get(
         spreadsheetId=spreadsheet_id,
-        range=f"{title}!A1:{col}1"
+        range=f"{title}!A1:{LAST_COL_LETTER}1"
     ).execute())
     vals = resp.get("values", [])
     if not vals:
@@ -377,52 +789,93 @@ def _header_exists(service, spreadsheet_id: str, title: str) -> bool:
     return len(row) >= len(CSV_FIELDS) and all((row[i] == CSV_FIELDS[i] for i in range(len(CSV_FIELDS))))
 
 # ------------------ STREAMED WRITERS -------------------------
-def _iter_rows_from_query(q, batch_size: int = 5000) -> Iterator[models.Product]:
-    # SQLAlchemy stream: avoid loading all rows into RAM
-    for p in q.yield_per(batch_size):
-        yield p
+SHEETS_CHUNK_ROWS = 5000               # rows per values.batchUpdate call
+SHEETS_CHUNK_BYTES = 2 * 1024 * 1024   # ...or fewer, once the cell text reaches ~2 MB
+
+
+def _iter_row_chunks(
+    rows: Iterable[Row], *, chunk_rows: int = SHEETS_CHUNK_ROWS, max_bytes: int = SHEETS_CHUNK_BYTES,
+) -> Iterator[List[List[str]]]:
+    """
+    Rows cut into Sheets write chunks bounded by row count and by payload size,
+    so long descriptions can't push a single request past the API's body limits.
+    """
+    buf: List[List[str]] = []
+    size = 0
+    for r in rows:
+        row = _row_from_tuple(r)
+        buf.append(row)
+        size += sum(map(len, row))
+        if len(buf) >= chunk_rows or size >= max_bytes:
+            yield buf
+            buf, size = [], 0
+    if buf:
+        yield buf
+
+
+SHEETS_WRITE_WORKERS = 4   # value writes in flight per export (Sheets quota retries via backoff)
+_sheets_pool = ThreadPoolExecutor(max_workers=2 * SHEETS_WRITE_WORKERS, thread_name_prefix="sheets")
+
+
+def _write_chunks_concurrently(
+    creds, spreadsheet_id: str, title: str, col_letters: str, first_row: int,
+    chunks: Iterator[List[List[str]]],
+) -> int:
+    """
+    Writes consecutive chunks from first_row down with up to SHEETS_WRITE_WORKERS
+    requests in flight. Each chunk's range is fixed when it is submitted, so the
+    completion order doesn't matter. Workers use their own thread-local service
+    (httplib2 isn't thread-safe); the DB stream stays on the calling thread.
+    Returns rows written.
+    """
+    def write(row: int, buf: List[List[str]]) -> None:
+        _write_chunk(_get_sheets_service(creds), spreadsheet_id, title, f"{col_letters}{row}", buf)
+
+    written = 0
+    pending = set()
+    try:
+        for buf in chunks:
+            if len(pending) >= SHEETS_WRITE_WORKERS:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for f in done:
+                    f.result()
+            pending.add(_sheets_pool.submit(write, first_row + written, buf))
+            written += len(buf)
+        for f in pending:
+            f.result()
+    except BaseException:
+        for f in pending:
+            f.cancel()
+        raise
+    return written
 
 
 def _write_replace_streamed(
-    service, spreadsheet_id: str, title: str, start_cell: str, row_iter: Iterator[models.Product],
-    *, chunk_rows: int = 1000
+    service, creds, spreadsheet_id: str, title: str, start_cell: str, chunks: Iterator[List[List[str]]],
 ) -> int:
     """
     Clears the sheet, writes header at start_cell, then streams rows in chunks below it.
     Returns total written rows (including header).
     """
     start_row, start_col_letters = _parse_a1_cell(start_cell)
-    last_col_letter = _col_letter(len(CSV_FIELDS))
 
     # clear entire data region (A:ZZ) to keep behavior consistent with original "replace"
-    _clear_tab(service, spreadsheet_id, title, last_col_letter)
+    _clear_tab(service, spreadsheet_id, title, LAST_COL_LETTER)
 
     # write header at start_cell (e.g., A1 or custom)
     _write_chunk(service, spreadsheet_id, title, f"{start_col_letters}{start_row}", [CSV_FIELDS])
-    written = 1
-    next_row = start_row + 1
-
-    buf: List[List[str]] = []
-    for p in row_iter:
-        buf.append(_row_from_product(p))
-        if len(buf) >= chunk_rows:
-            _write_chunk(service, spreadsheet_id, title, f"{start_col_letters}{next_row}", buf)
-            written += len(buf)
-            next_row += len(buf)
-            buf = []
-    if buf:
-        _write_chunk(service, spreadsheet_id, title, f"{start_col_letters}{next_row}", buf)
-        written += len(buf)
-
-    return written
+    return 1 + _write_chunks_concurrently(
+        creds, spreadsheet_id, title, start_col_letters, start_row + 1, chunks
+    )
 
 
 def _write_append_streamed(
-    service, spreadsheet_id: str, title: str, row_iter: Iterator[models.Product],
-    *, chunk_rows: int = 1000
+    service, creds, spreadsheet_id: str, title: str, chunks: Iterator[List[List[str]]],
 ) -> int:
     """
-    Appends to the end of the sheet (based on column A).
+    Appends to the end of the sheet (based on column A), writing every chunk to a
+    fixed range below the last non-empty row, concurrently. Nothing is inserted,
+    so rows already in the sheet never move under the fixed-range writes.
     If the sheet is empty, writes the header first.
     Returns total written rows (includes header if written).
     """
@@ -439,19 +892,9 @@ def _write_append_streamed(
         # we just continue appending after last_row.
         next_row = last_row + 1
 
-    buf: List[List[str]] = []
-    for p in row_iter:
-        buf.append(_row_from_product(p))
-        if len(buf) >= chunk_rows:
-            _write_chunk(service, spreadsheet_id, title, f"A{next_row}", buf)
-            written += len(buf)
-            next_row += len(buf)
-            buf = []
-    if buf:
-        _write_chunk(service, spreadsheet_id, title, f"A{next_row}", buf)
-        written += len(buf)
-
-    return written
+    return written + _write_chunks_concurrently(
+        creds, spreadsheet_id, title, "A", next_row, chunks
+    )
 
 # ------------------ API MODEL -------------------------
 class SheetExportBody(BaseModel):
@@ -464,7 +907,7 @@ class SheetExportBody(BaseModel):
 @router.post("/products.google-sheet", dependencies=[Depends(get_current_user)])
 def export_products_to_google_sheet(
     body: SheetExportBody = Body(...),
-    db: Session = Depends(get_session),
+    db: Session = Depends(get_export_session),
     site: Optional[str] = Query(None),
     site_id: Optional[int] = Query(None),
     type: Optional[str] = Query(None),
@@ -473,38 +916,47 @@ def export_products_to_google_sheet(
     last_seen_from: Optional[str] = Query(None, description="YYYY-MM-DD or ISO-8601"),
     last_seen_to: Optional[str] = Query(None, description="YYYY-MM-DD or ISO-8601"),
     limit: Optional[int] = Query(None, ge=1, le=200000),
-    sort: Optional[str] = Query("last_seen_desc", description="last_seen_desc|last_seen_asc"),
+    sort: Optional[str] = Query("last_seen_desc", description=SORT_CHOICES),
 ):
     # ----- build selection -----
     selected_ids: List[int] = []
     if id is not None:
         selected_ids = [id]
-    elif ids:
-        try:
-            selected_ids = [int(x.strip()) for x in ids.split(",") if x.strip()]
-        except ValueError:
-            raise HTTPException(status_code=400, detail="ids must be comma-separated integers")
+    elif ids is not None:
+        selected_ids = _parse_ids(ids)
 
     # ----- query data (filters only) -----
+    # an explicit id selection skips the date range and sort: ids keep input order
     q = _apply_filters(
-        _base_query(db),
+        _base_query(),
         site=site, site_id=site_id, type_=type,
         selected_ids=selected_ids,
-        last_seen_from=last_seen_from, last_seen_to=last_seen_to,
-        limit=limit,
+        last_seen_from=None if selected_ids else last_seen_from,
+        last_seen_to=None if selected_ids else last_seen_to,
+        limit=None,
+        ids_as_array=db.get_bind().dialect.name == "postgresql",
     )
 
-    # ----- apply sorting once -----
-    s = (sort or "").lower()
-    if s == "last_seen_desc":
-        q = q.order_by(models.Product.last_seen_at.desc())
-    elif s == "last_seen_asc":
-        q = q.order_by(models.Product.last_seen_at.asc())
-    else:
-        q = q.order_by(models.Product.id.asc())
+    # ----- row cap: refuse before touching the sheet (a 413 beats a half-written tab) -----
+    max_rows = settings.sheets_max_rows
+    if max_rows and not selected_ids and (limit is None or limit > max_rows):
+        total = db.execute(select(func.count()).select_from(q.subquery())).scalar_one()
+        if total > max_rows:
+            raise HTTPException(
+                status_code=413,
+                detail=(
+                    f"{total} rows exceed the Google Sheets export cap of {max_rows}. "
+                    "Narrow the filters, pass limit, or use GET /exports/products.csv."
+                ),
+            )
 
-    # Stream the DB rows
-    rows_iter = _iter_rows_from_query(q, batch_size=5000)
+    if selected_ids:
+        row_chunks = _iter_row_chunks(_fetch_by_ids_in_order(db, q, selected_ids, limit))
+    else:
+        # keyset pages: short index-range queries, no cursor held across Sheets writes;
+        # the export transaction (one REPEATABLE READ snapshot) stays open until the end
+        pages = _keyset_pages(db, q, sort=sort, limit=limit, page_rows=SHEETS_CHUNK_ROWS)
+        row_chunks = _iter_row_chunks(chain.from_iterable(pages))
 
     # ----- auth / service -----
     try:
@@ -546,19 +998,19 @@ def export_products_to_google_sheet(
         if body.mode == "append":
             written_rows = _write_append_streamed(
                 service=service,
+                creds=creds,
                 spreadsheet_id=body.spreadsheet_id,
                 title=sheet_title,
-                row_iter=rows_iter,
-                chunk_rows=1000,  # tune if needed
+                chunks=row_chunks,
             )
         else:
             written_rows = _write_replace_streamed(
                 service=service,
+                creds=creds,
                 spreadsheet_id=body.spreadsheet_id,
                 title=sheet_title,
                 start_cell=body.start_cell or "A1",
-                row_iter=rows_iter,
-                chunk_rows=1000,  # tune if needed
+                chunks=row_chunks,
             )
     except Exception as e:
         logger.exception("Failed to write to Google Sheet")
@@ -1,9 +1,11 @@
 # routers/jobs.py
 from __future__ import annotations
 import json
-from sqlalchemy import or_
+import logging
+from sqlalchemy import Text, any_, func, insert, literal, or_, select, update
 
 import asyncio
+from contextlib import aclosing
 from typing import Any, Dict, Optional, Callable, List
 from datetime import datetime  # <-- added for DB persistence timestamps
 
@@ -26,8 +28,14 @@ from scrapers.rebatekey_urls import collect_rebatekey_urls
 from scrapers.myvipon_urls import collect_myvipon_urls
 from scrapers.myvipon_details import _scrape_one as vipon_scrape_one, DEFAULT_REFERER as VIPON_REFERER
 from scrapers.myvipon_details import scrape_details_for_urls as scrape_myvipon_details
+from sqlalchemy.dialects.postgresql import ARRAY as PG_ARRAY, insert as pg_insert
 from sqlalchemy.exc import DBAPIError, ProgrammingError
 
+try:
+    import orjson  # type: ignore
+except ImportError:  # optional; stdlib json fallback
+    orjson = None
+
 # --- Persistence (sync functions) ---
 from services.persist_products import (
     upsert_product_details,
@@ -36,12 +44,135 @@ from services.persist_products import (
     upsert_product_urls,
 )
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/jobs", tags=["jobs"])
 JOB_TASKS: dict[str, asyncio.Task] = {}
 
+# SSE: a client whose socket accepts nothing for this long is disconnected. The
+# per-job event queue is already bounded (jobs.manager.QUEUE_MAXSIZE, drop-oldest),
+# so a stalled client only pins its own generator, never memory.
+SSE_SEND_TIMEOUT_S = 15.0
+
+# Per-URL progress is coalesced: one tick (and one DB write) per N URLs or T seconds.
+TICK_FLUSH_N = 25
+TICK_FLUSH_S = 0.5
+
+# Tick persistence is off the event loop: _persist_tick only enqueues and a single
+# writer task flushes up to BATCH records (or whatever arrived within WAIT_S) per
+# transaction, one JobRun UPDATE per run.
+TICK_QUEUE_MAXSIZE = 10_000
+TICK_WRITER_BATCH = 200
+TICK_WRITER_WAIT_S = 0.25
+_TICK_Q: Optional[asyncio.Queue] = None
+_TICK_WRITER: Optional[asyncio.Task] = None
+
+
+def _write_ticks(records: List[tuple]) -> None:
+    """One transaction for a batch of (run_id, ok, plus, note, meta, ts) records."""
+    totals: Dict[int, List[int]] = {}  # run_id -> [processed, ok, fail]
+    events: List[dict] = []
+    for run_id, ok, inc, note, meta, ts in records:
+        t = totals.setdefault(run_id, [0, 0, 0])
+        t[0] += inc
+        t[1 if ok else 2] += inc
+        events.append({
+            "run_id": run_id,
+            "ts": ts,  # when the tick happened, not when the batch was flushed
+            "level": "info" if ok else "error",
+            "message": note or "",
+            "plus": inc,
+            "meta": meta or {},
+        })
+    with SessionLocal() as db2:
+        # Core executemany: no ORM objects / unit of work for append-only events
+        db2.execute(insert(models.JobEvent.__table__), events)
+        R = models.JobRun
+        for run_id, (p, ok_n, fail_n) in totals.items():
+            db2.execute(
+                update(R)
+                .where(R.id == run_id)
+                .values(
+                    processed=func.coalesce(R.processed, 0) + p,
+                    ok_count=func.coalesce(R.ok_count, 0) + ok_n,
+                    fail_count=func.coalesce(R.fail_count, 0) + fail_n,
+                )
+            )
+        db2.commit()
+
+
+async def _tick_writer(q: asyncio.Queue) -> None:
+    loop = asyncio.get_running_loop()
+    stop = False
+    while not stop:
+        rec = await q.get()
+        batch: List[tuple] = []
+        deadline = loop.time() + TICK_WRITER_WAIT_S
+        while True:
+            if rec is None:  # shutdown sentinel
+                stop = True
+                break
+            batch.append(rec)
+            if len(batch) >= TICK_WRITER_BATCH:
+                break
+            try:
+                rec = await asyncio.wait_for(q.get(), max(0.0, deadline - loop.time()))
+            except asyncio.TimeoutError:
+                break
+        if batch:
+            try:
+                await asyncio.to_thread(_write_ticks, batch)
+            except Exception:
+                logger.exception("Failed to persist %d job ticks", len(batch))
+
+
+def start_tick_writer() -> None:
+    """Start the tick writer on the running loop (idempotent; called from lifespan)."""
+    global _TICK_Q, _TICK_WRITER
+    if _TICK_WRITER is not None and not _TICK_WRITER.done():
+        return
+    _TICK_Q = asyncio.Queue(maxsize=TICK_QUEUE_MAXSIZE)
+    _TICK_WRITER = asyncio.create_task(_tick_writer(_TICK_Q))
+
+
+async def stop_tick_writer() -> None:
+    """Flush queued ticks and stop the writer."""
+    global _TICK_WRITER
+    if _TICK_WRITER is None:
+        return
+    if not _TICK_WRITER.done():
+        await _TICK_Q.put(None)
+        await _TICK_WRITER
+    _TICK_WRITER = None
+
 # ---- Persist job_manager state to DB (place right after router = APIRouter(...)) ----
 # This wraps job_manager so every create/mark_running/tick/finish also writes to your
 # Job / JobRun / JobEvent tables. No changes to your existing code paths.
+_JOB_ID_CACHE: Dict[str, int] = {}  # Job.name -> Job.id; a handful of kinds, never evicted
+
+
+def _resolve_job_id(db2: Session, kind: str) -> int:
+    job_id = _JOB_ID_CACHE.get(kind)
+    if job_id is not None:
+        return job_id
+    if db2.get_bind().dialect.name == "postgresql":
+        # get-or-create in one statement (no-op update so RETURNING yields the existing row)
+        stmt = pg_insert(models.Job).values(name=kind, is_active=True)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[models.Job.name], set_={"name": stmt.excluded.name}
+        ).returning(models.Job.id)
+        job_id = db2.execute(stmt).scalar_one()
+    else:
+        job = db2.query(models.Job).filter(models.Job.name == kind).one_or_none()
+        if not job:
+            job = models.Job(name=kind, is_active=True)
+            db2.add(job)
+            db2.flush()  # get job.id
+        job_id = job.id
+    _JOB_ID_CACHE[kind] = job_id
+    return job_id
+
+
 if not getattr(job_manager, "_db_persist_patched", False):
     _JOBID_TO_DB_RUN: Dict[str, int] = {}
 
@@ -50,43 +181,60 @@ if not getattr(job_manager, "_db_persist_patched", False):
     _orig_tick = job_manager.tick
     _orig_finish = job_manager.finish
 
-    async def _persist_create(*, kind: str, total: int = 0, meta: Optional[dict] = None):
-        st = await _orig_create(kind=kind, total=total, meta=meta or {})
+    # Sync DB work for create/mark_running/finish runs in a worker thread
+    # (asyncio.to_thread, same as the upserts) so it never stalls the loop / SSE.
+    def _db_create_run(kind: str, total: int, meta: dict) -> int:
         with SessionLocal() as db2:
-            job = db2.query(models.Job).filter(models.Job.name == kind).one_or_none()
-            if not job:
-                job = models.Job(name=kind, is_active=True)
-                db2.add(job)
-                db2.flush()  # get job.id
             run = models.JobRun(
-                job_id=job.id,
+                job_id=_resolve_job_id(db2, kind),
                 status="queued",
-                queued_at=datetime.utcnow(),
                 total=int(total or 0),
-                note=(meta or {}).get("note", ""),
-                meta=(meta or {}),
+                note=meta.get("note", ""),
+                meta=meta,
             )
             db2.add(run)
+            db2.flush()  # get run.id without a refresh after commit
+            run_id = run.id
             db2.commit()
-            _JOBID_TO_DB_RUN[st.id] = run.id
-            try:
-                st.meta["db_run_id"] = run.id
-            except Exception:
-                pass
+            return run_id
+
+    def _db_mark_running(run_id: int, total: Optional[int]) -> None:
+        with SessionLocal() as db2:
+            run = db2.query(models.JobRun).filter(models.JobRun.id == run_id).first()
+            if run:
+                if total is not None:
+                    run.total = int(total)
+                run.status = "running"
+                run.started_at = datetime.utcnow()
+                db2.commit()
+
+    def _db_finish(run_id: int, status: str, note: str) -> None:
+        with SessionLocal() as db2:
+            run = db2.query(models.JobRun).filter(models.JobRun.id == run_id).first()
+            if run:
+                run.status = status
+                run.finished_at = datetime.utcnow()
+                if status == "error":
+                    run.error_text = note
+                elif note:
+                    run.note = note
+                db2.commit()
+
+    async def _persist_create(*, kind: str, total: int = 0, meta: Optional[dict] = None):
+        st = await _orig_create(kind=kind, total=total, meta=meta or {})
+        run_id = await asyncio.to_thread(_db_create_run, kind, total, meta or {})
+        _JOBID_TO_DB_RUN[st.id] = run_id
+        try:
+            st.meta["db_run_id"] = run_id
+        except Exception:
+            pass
         return st
 
     async def _persist_mark_running(job_id: str, total: Optional[int] = None):
         res = await _orig_mark_running(job_id, total)
         run_id = _JOBID_TO_DB_RUN.get(job_id)
         if run_id:
-            with SessionLocal() as db2:
-                run = db2.query(models.JobRun).filter(models.JobRun.id == run_id).first()
-                if run:
-                    if total is not None:
-                        run.total = int(total)
-                    run.status = "running"
-                    run.started_at = datetime.utcnow()
-                    db2.commit()
+            await asyncio.to_thread(_db_mark_running, run_id, total)
         return res
 
     async def _persist_tick(job_id: str, *, ok: bool, plus: int = 0, note: str = "", meta: Optional[dict] = None):
@@ -94,43 +242,17 @@ if not getattr(job_manager, "_db_persist_patched", False):
         run_id = _JOBID_TO_DB_RUN.get(job_id)
         if not run_id:
             return res
-        with SessionLocal() as db2:
-            run = db2.query(models.JobRun).filter(models.JobRun.id == run_id).first()
-            if run:
-                inc = int(plus or 0)
-                run.processed = (run.processed or 0) + (inc if inc > 0 else 1)
-                if ok:
-                    run.ok_count = (run.ok_count or 0) + (inc if inc > 0 else 1)
-                    level = "info"
-                else:
-                    run.fail_count = (run.fail_count or 0) + (inc if inc > 0 else 1)
-                    level = "error"
-                db2.add(models.JobEvent(
-                    run_id=run_id,
-                    ts=datetime.utcnow(),
-                    level=level,
-                    message=note or "",
-                    plus=inc if inc > 0 else 1,
-                    meta=meta or {},
-                ))
-            db2.commit()
+        start_tick_writer()  # no-op once lifespan started it
+        inc = int(plus or 0)
+        # only waits when the writer is TICK_QUEUE_MAXSIZE records behind
+        await _TICK_Q.put((run_id, ok, inc if inc > 0 else 1, note, meta, datetime.utcnow()))
         return res
 
     async def _persist_finish(job_id: str, status: str, note: str = ""):
         res = await _orig_finish(job_id, status, note)
-        run_id = _JOBID_TO_DB_RUN.get(job_id)
+        run_id = _JOBID_TO_DB_RUN.pop(job_id, None)
         if run_id:
-            with SessionLocal() as db2:
-                run = db2.query(models.JobRun).filter(models.JobRun.id == run_id).first()
-                if run:
-                    run.status = status
-                    run.finished_at = datetime.utcnow()
-                    if status == "error":
-                        run.error_text = note
-                    elif note:
-                        run.note = note
-                    db2.commit()
-            _JOBID_TO_DB_RUN.pop(job_id, None)
+            await asyncio.to_thread(_db_finish, run_id, status, note)
         return res
 
     job_manager.create = _persist_create
@@ -141,7 +263,96 @@ if not getattr(job_manager, "_db_persist_patched", False):
 # ---- end persistence shim ----
 
 
+class _TickAggregator:
+    """
+    Collects per-URL results and forwards them to job_manager.tick in batches
+    (at most one ok + one fail tick per window), so the persistence shim writes
+    one UPDATE + JobEvent per window instead of per URL.
+
+        async with _TickAggregator(job_id) as agg:
+            agg.add(True, url)
+    """
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.ok = 0
+        self.fail = 0
+        self.last_url: Optional[str] = None
+        self.last_note = ""
+        self.last_meta: Optional[Dict[str, Any]] = None
+        self._lock = asyncio.Lock()
+        self._wake = asyncio.Event()
+        self._closed = False
+        self._task: Optional[asyncio.Task] = None
+
+    def add(
+        self, ok: bool, url: Optional[str] = None, note: str = "",
+        meta: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        # sync on purpose: callable from the loop or via call_soon_threadsafe
+        if ok:
+            self.ok += 1
+        else:
+            self.fail += 1
+        if url:
+            self.last_url = url
+        if note:
+            self.last_note = note
+        if meta:
+            self.last_meta = meta
+        if self.ok + self.fail >= TICK_FLUSH_N:
+            self._wake.set()
+
+    async def flush(self) -> None:
+        async with self._lock:
+            ok_n, fail_n = self.ok, self.fail
+            if not (ok_n or fail_n):
+                return
+            # the window's last caller meta is merged over last_url, as a per-URL tick would
+            meta = {"last_url": self.last_url} if self.last_url else {}
+            meta.update(self.last_meta or {})
+            meta = meta or None
+            note = self.last_note
+            self.ok = self.fail = 0
+            self.last_note = ""
+            self.last_meta = None
+            if ok_n:
+                await job_manager.tick(self.job_id, ok=True, plus=ok_n, meta=meta)
+            if fail_n:
+                await job_manager.tick(self.job_id, ok=False, plus=fail_n, note=note, meta=meta)
+
+    async def _flusher(self) -> None:
+        while not self._closed:
+            try:
+                await asyncio.wait_for(self._wake.wait(), TICK_FLUSH_S)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    async def flush_final(self) -> None:
+        self._closed = True
+        self._wake.set()
+        if self._task is not None:
+            await self._task
+        await self.flush()
+
+    async def __aenter__(self) -> "_TickAggregator":
+        self._task = asyncio.create_task(self._flusher())
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.flush_final()
+
+
 # ---------- status + SSE stream ----------
+def _sse_data(state: dict) -> str:
+    # compact JSON, encoded once per event
+    if orjson is not None:
+        return orjson.dumps(state).decode("utf-8")
+    return json.dumps(state, separators=(",", ":"))
+
+
 @router.get("/status/{job_id}")
 def job_status(job_id: str):
     st = job_manager.get(job_id)
@@ -157,18 +368,19 @@ async def job_stream(job_id: str, request: Request):
         raise HTTPException(404, "job not found")
 
     async def gen():
-        async for event in job_manager.stream(job_id):
-            if await request.is_disconnected():
-                break
-            if event.get("type") == "end":
-                break
-            # ⭐ Ensure valid JSON for the browser
-            yield {
-                "event": event["type"],
-                "data": json.dumps(event["state"]),
-            }
+        # aclosing: leaving early (disconnect) closes the stream right away, which
+        # unregisters its queue, instead of whenever the generator is collected
+        async with aclosing(job_manager.stream(job_id)) as events:
+            async for event in events:
+                if await request.is_disconnected():
+                    break
+                # ⭐ Ensure valid JSON for the browser
+                yield {
+                    "event": event["type"],
+                    "data": _sse_data(event["state"]),
+                }
 
-    return EventSourceResponse(gen())
+    return EventSourceResponse(gen(), send_timeout=SSE_SEND_TIMEOUT_S)
 
 
 # ---------- start a scrape job ----------
@@ -241,7 +453,13 @@ async def _prep_rebaid_details(p: Dict[str, Any], db: Session):
     timeout_ms: int = int(p.get("timeout_ms", 12000))
 
     # Use request-scoped db *only* to discover targets
-    q = db.query(models.Product).join(models.Site).filter(models.Site.name == "rebaid")
+    # only the URL column: no Product hydration for rows we just project
+    q = (
+        db.query(models.Product.product_url)
+        .select_from(models.Product)
+        .join(models.Site)
+        .filter(models.Site.name == "rebaid")
+    )
     if missing_only:
         q = q.filter(
             (models.Product.title.is_(None))
@@ -249,8 +467,9 @@ async def _prep_rebaid_details(p: Dict[str, Any], db: Session):
             | (models.Product.image_url.is_(None))
             | (models.Product.amazon_url.is_(None))
         )
-    rows = q.order_by(models.Product.created_at.desc()).limit(limit).all()
-    urls: List[str] = [r.product_url for r in rows if r.product_url]
+    q = q.order_by(models.Product.created_at.desc()).limit(limit)
+    # target discovery is sync SQLAlchemy: keep it off the event loop
+    urls: List[str] = await asyncio.to_thread(lambda: [u for (u,) in q.yield_per(500) if u])
     total = len(urls)
 
     async def run(job_id: str):
@@ -258,22 +477,23 @@ async def _prep_rebaid_details(p: Dict[str, Any], db: Session):
         with SessionLocal() as db2:
             ok_items: list[dict] = []
             # run each scrape in a thread to keep the loop free for SSE
-            for u in urls:
-                try:
-                    data_list = await asyncio.to_thread(scrape_rebaid_details, [u], timeout_ms=timeout_ms)
-                    data = data_list[0] if data_list else {"url": u}
-                    ok_items.append(
-                        {
-                            "url": data.get("url", u),
-                            "title": data.get("title"),
-                            "description": data.get("description"),
-                            "amazon_url": data.get("amazon_url"),
-                            "image_url": data.get("image_url"),
-                        }
-                    )
-                    await job_manager.tick(job_id, ok=True, meta={"last_url": u})
-                except Exception as e:
-                    await job_manager.tick(job_id, ok=False, note=f"{u}: {e}")
+            async with _TickAggregator(job_id) as agg:
+                for u in urls:
+                    try:
+                        data_list = await asyncio.to_thread(scrape_rebaid_details, [u], timeout_ms=timeout_ms)
+                        data = data_list[0] if data_list else {"url": u}
+                        ok_items.append(
+                            {
+                                "url": data.get("url", u),
+                                "title": data.get("title"),
+                                "description": data.get("description"),
+                                "amazon_url": data.get("amazon_url"),
+                                "image_url": data.get("image_url"),
+                            }
+                        )
+                        agg.add(True, u)
+                    except Exception as e:
+                        agg.add(False, u, f"{u}: {e}")
 
             if ok_items:
                 await asyncio.to_thread(upsert_product_details, db2, "rebaid", ok_items)
@@ -303,7 +523,9 @@ async def _prep_myvipon_details(p: Dict[str, Any], db: Session):
     referer: str = p.get("referer") or VIPON_REFERER
 
     # discover targets using the request-scoped session
-    site = db.query(models.Site).filter(models.Site.name == "myvipon").one_or_none()
+    site = await asyncio.to_thread(
+        db.query(models.Site).filter(models.Site.name == "myvipon").one_or_none
+    )
     if not site:
         raise HTTPException(400, "Site 'myvipon' is not seeded")
 
@@ -318,7 +540,8 @@ async def _prep_myvipon_details(p: Dict[str, Any], db: Session):
             )
         )
 
-    urls = [u for (u,) in q.order_by(models.Product.id.desc()).limit(limit).all() if u]
+    q = q.order_by(models.Product.id.desc()).limit(limit)
+    urls = [u for (u,) in await asyncio.to_thread(q.all) if u]
     total = len(urls)
 
     async def run(job_id: str):
@@ -338,16 +561,16 @@ async def _prep_myvipon_details(p: Dict[str, Any], db: Session):
                     data = await asyncio.to_thread(
                         vipon_scrape_one, u, referer, timeout, proxy, retries, backoff
                     )
-                    ok = data.get("status") == "ok"
-                    await job_manager.tick(job_id, ok=ok, meta={"last_url": u})
+                    agg.add(data.get("status") == "ok", u)
                     return data
                 except Exception as e:
-                    await job_manager.tick(job_id, ok=False, meta={"last_url": u}, note=str(e))
+                    agg.add(False, u, str(e))
                     return {"url": u, "status": "error", "error": str(e)}
 
-        tasks = [asyncio.create_task(run_one(u)) for u in urls]
-        for fut in asyncio.as_completed(tasks):
-            results.append(await fut)
+        async with _TickAggregator(job_id) as agg:
+            tasks = [asyncio.create_task(run_one(u)) for u in urls]
+            for fut in asyncio.as_completed(tasks):
+                results.append(await fut)
 
         ok_items = [r for r in results if r.get("status") == "ok"]
         if ok_items:
@@ -364,7 +587,12 @@ async def _prep_rebatekey_details(p: Dict[str, Any], db: Session):
     retries: int = int(p.get("retries", 2))
     timeout: float = float(p.get("timeout", 20.0))
 
-    q = db.query(models.Product).join(models.Site).filter(models.Site.name == "rebatekey")
+    q = (
+        db.query(models.Product.product_url)
+        .select_from(models.Product)
+        .join(models.Site)
+        .filter(models.Site.name == "rebatekey")
+    )
     if missing_only:
         q = q.filter(
             (models.Product.title.is_(None))
@@ -374,39 +602,38 @@ async def _prep_rebatekey_details(p: Dict[str, Any], db: Session):
             | (models.Product.category.is_(None))
             | (models.Product.price.is_(None))
         )
-    rows = q.order_by(models.Product.created_at.desc()).limit(limit).all()
-    urls: List[str] = [r.product_url for r in rows if r.product_url]
+    q = q.order_by(models.Product.created_at.desc()).limit(limit)
+    # target discovery is sync SQLAlchemy: keep it off the event loop
+    urls: List[str] = await asyncio.to_thread(lambda: [u for (u,) in q.yield_per(500) if u])
     total = len(urls)
 
     async def run(job_id: str):
         with SessionLocal() as db2:
             loop = asyncio.get_running_loop()
 
-            # Thread-safe progress callback (called from worker thread)
-            def on_progress(idx: int, url: str, ok: bool, meta: dict | None = None):
-                loop.call_soon_threadsafe(
-                    asyncio.create_task,
-                    job_manager.tick(job_id, ok=ok, meta={"last_url": url, **(meta or {})}),
-                )
+            async with _TickAggregator(job_id) as agg:
+                # Thread-safe progress callback (called from worker thread)
+                def on_progress(idx: int, url: str, ok: bool, meta: dict | None = None):
+                    loop.call_soon_threadsafe(agg.add, ok, url, "", meta)
 
-            # run the whole bulk scrape in a separate thread
-            try:
-                scraped = await asyncio.to_thread(
-                    collect_rebatekey_details,
-                    urls,
-                    concurrency=concurrency,
-                    retries=retries,
-                    timeout=timeout,
-                    on_progress=on_progress,  # safe now
-                )
-            except TypeError:
-                scraped = await asyncio.to_thread(
-                    collect_rebatekey_details,
-                    urls,
-                    concurrency=concurrency,
-                    retries=retries,
-                    timeout=timeout,
-                )
+                # run the whole bulk scrape in a separate thread
+                try:
+                    scraped = await asyncio.to_thread(
+                        collect_rebatekey_details,
+                        urls,
+                        concurrency=concurrency,
+                        retries=retries,
+                        timeout=timeout,
+                        on_progress=on_progress,  # safe now
+                    )
+                except TypeError:
+                    scraped = await asyncio.to_thread(
+                        collect_rebatekey_details,
+                        urls,
+                        concurrency=concurrency,
+                        retries=retries,
+                        timeout=timeout,
+                    )
 
             items = [
                 {
@@ -432,8 +659,14 @@ async def _prep_amazon_stores(p: Dict[str, Any], db: Session):
     missing_only: bool = bool(p.get("missing_only", True))
     limit: int = int(p.get("limit", 500))
     timeout_ms: int = int(p.get("timeout_ms", 12000))
+    parallel_batches: int = max(1, int(p.get("parallel_batches", 1)))  # opt-in concurrency
 
-    q = db.query(models.Product).join(models.Site)
+    # (product_url, amazon_url, site name) tuples instead of full Product rows
+    q = (
+        db.query(models.Product.product_url, models.Product.amazon_url, models.Site.name)
+        .select_from(models.Product)
+        .join(models.Site)
+    )
     if site:
         q = q.filter(models.Site.name == site)
     if missing_only:
@@ -450,44 +683,61 @@ async def _prep_amazon_stores(p: Dict[str, Any], db: Session):
     else:
         q = q.filter((models.Product.amazon_url.is_not(None)) & (models.Product.amazon_url != ""))
 
-    rows = q.order_by(models.Product.updated_at.desc()).limit(limit).all()
-    urls: List[str] = [r.amazon_url for r in rows if r.amazon_url]
+    rows = await asyncio.to_thread(q.order_by(models.Product.updated_at.desc()).limit(limit).all)
+    urls: List[str] = list(dict.fromkeys(r.amazon_url for r in rows if r.amazon_url))
     total = len(urls)
 
     async def run(job_id: str):
-        with SessionLocal() as db2:
-            BATCH = 25
-            site_name = rows[0].site.name if rows else (site or "unknown")
+        BATCH = 25
+        site_name = rows[0].name if rows else (site or "unknown")
+
+        # amazon_url -> product urls (several products can share one listing)
+        az_to_purls: Dict[str, List[str]] = {}
+        for r in rows:
+            if r.amazon_url:
+                az_to_purls.setdefault(r.amazon_url, []).append(r.product_url)
+
+        def upsert(items: list[dict]) -> None:
+            # A short-lived session per batch, opened and closed on the worker
+            # thread: to_thread can't be cancelled, so a batch still writing when
+            # a sibling fails must not share a session that gets closed under it.
+            with SessionLocal() as db2:
+                upsert_amazon_store_fields(db2, site_name, items)
 
-            processed = 0
-            for i in range(0, len(urls), BATCH):
-                chunk = urls[i : i + BATCH]
+        # parallel_batches > 1 scrapes (and upserts) several batches at once;
+        # each amazon_url is in one batch, so concurrent upserts touch disjoint rows
+        sem = asyncio.Semaphore(parallel_batches)
+        processed = 0
 
+        async def do_batch(chunk: List[str]):
+            nonlocal processed
+            async with sem:
                 store_map = await asyncio.to_thread(
                     scrape_amazon_store_many, chunk, timeout_ms=timeout_ms
                 )
 
-                items: list[dict] = []
-                # map results back to products in this batch only (minor perf)
-                batch_urls = set(chunk)
-                for r in rows:
-                    if r.amazon_url in batch_urls and r.amazon_url in store_map:
-                        info = store_map[r.amazon_url]
-                        items.append(
-                            {
-                                "url": r.product_url,
-                                "amazon_store_name": info.get("amazon_store_name"),
-                                "amazon_store_url": info.get("amazon_store_url"),
-                            }
-                        )
+            # map results back to products via the index, not a scan of all rows
+            items: list[dict] = [
+                {
+                    "url": purl,
+                    "amazon_store_name": store_map[u].get("amazon_store_name"),
+                    "amazon_store_url": store_map[u].get("amazon_store_url"),
+                }
+                for u in chunk
+                if u in store_map
+                for purl in az_to_purls.get(u, ())
+            ]
 
-                if items:
-                    await asyncio.to_thread(
-                        upsert_amazon_store_fields, db2, site_name, items
-                    )
+            if items:
+                await asyncio.to_thread(upsert, items)
 
-                processed += len(chunk)
-                await job_manager.tick(job_id, ok=True, plus=len(chunk), meta={"last_batch_end": processed})
+            processed += len(chunk)
+            await job_manager.tick(job_id, ok=True, plus=len(chunk), meta={"last_batch_end": processed})
+
+        # TaskGroup rather than bare gather: a failing batch cancels its siblings
+        async with asyncio.TaskGroup() as tg:
+            for i in range(0, len(urls), BATCH):
+                tg.create_task(do_batch(urls[i : i + BATCH]))
 
     return total, run
 
@@ -588,7 +838,6 @@ async def _prep_full_fresh_run(p: Dict[str, Any], db: Session):
     """
     import asyncio
     from functools import partial
-    from collections import OrderedDict
     from sqlalchemy.exc import DBAPIError, ProgrammingError
 
     # ----------------- small utils -----------------
@@ -615,7 +864,8 @@ async def _prep_full_fresh_run(p: Dict[str, Any], db: Session):
 
     def _dedupe_items_by_url(items: list[dict], url_key: str = "url") -> list[dict]:
         """Merge duplicates by URL; prefer non-null/non-empty fields from later items."""
-        merged: "OrderedDict[str, dict]" = OrderedDict()
+        merged: dict[str, dict] = {}  # insertion-ordered
+        copied: set[str] = set()      # copy-on-write: unique URLs are never copied
         for it in items:
             u = it.get(url_key)
             if not u:
@@ -625,17 +875,20 @@ async def _prep_full_fresh_run(p: Dict[str, Any], db: Session):
                     it[url_key] = u
             if not u:
                 continue
-            if u not in merged:
-                merged[u] = it.copy()
-            else:
-                base = merged[u]
-                # fill blanks only; do NOT overwrite non-empty values
-                for k, v in it.items():
-                    if k in ("url", "product_url"):
-                        continue
-                    if base.get(k) in (None, "", []):
-                        if v not in (None, "", []):
-                            base[k] = v
+            base = merged.get(u)
+            if base is None:
+                merged[u] = it
+                continue
+            if u not in copied:
+                base = merged[u] = base.copy()
+                copied.add(u)
+            # fill blanks only; do NOT overwrite non-empty values
+            for k, v in it.items():
+                if v is None or v == "" or v == [] or k == "url" or k == "product_url":
+                    continue
+                bv = base.get(k)
+                if bv is None or bv == "" or bv == []:
+                    base[k] = v
         return list(merged.values())
 
     async def _adaptive_upsert(call, rows: list, *, approx_cols_per_row: int, start_cap: int, session):
@@ -718,6 +971,14 @@ async def _prep_full_fresh_run(p: Dict[str, Any], db: Session):
             def _existing_url_set(candidate_urls: list[str]) -> set[str]:
                 if not candidate_urls:
                     return set()
+                if db2.get_bind().dialect.name == "postgresql":
+                    # one statement, one array parameter: product_url = ANY(:urls)
+                    rows = db2.execute(
+                        select(models.Product.product_url).where(
+                            models.Product.product_url == any_(literal(candidate_urls, PG_ARRAY(Text)))
+                        )
+                    )
+                    return {u for (u,) in rows}
                 OUT: set[str] = set()
                 CH = 1000
                 for i in range(0, len(candidate_urls), CH):
@@ -771,7 +1032,7 @@ async def _prep_full_fresh_run(p: Dict[str, Any], db: Session):
             rebaid_detail_targets = _dedupe_urls([x["url"] for x in rebaid_items])
 
             rebaid_urls = [x["url"] for x in rebaid_items]
-            rebaid_existing = _existing_url_set(rebaid_urls)
+            rebaid_existing = await asyncio.to_thread(_existing_url_set, rebaid_urls)
             rebaid_new_items = [x for x in rebaid_items if x["url"] not in rebaid_existing]
             if rebaid_new_items:
                 await _chunked_upsert_items(db2, "rebaid", rebaid_new_items)
@@ -784,7 +1045,7 @@ async def _prep_full_fresh_run(p: Dict[str, Any], db: Session):
             rk_detail_targets = _dedupe_urls(rk_rebate + rk_coupons)
 
             rk_urls_all = rk_rebate + rk_coupons
-            rk_existing = _existing_url_set(rk_urls_all)
+            rk_existing = await asyncio.to_thread(_existing_url_set, rk_urls_all)
             rk_rebate_new = [u for u in rk_rebate if u not in rk_existing]
             rk_coupon_new = [u for u in rk_coupons if u not in rk_existing]
             if rk_rebate_new:
@@ -809,7 +1070,7 @@ async def _prep_full_fresh_run(p: Dict[str, Any], db: Session):
             mv_detail_targets = _dedupe_urls([x["url"] for x in mv_items])
 
             mv_urls_all = [x["url"] for x in mv_items]
-            mv_existing = _existing_url_set(mv_urls_all)
+            mv_existing = await asyncio.to_thread(_existing_url_set, mv_urls_all)
             mv_new_items = [x for x in mv_items if x["url"] not in mv_existing]
             if mv_new_items:
                 await _chunked_upsert_items(db2, "myvipon", mv_new_items)
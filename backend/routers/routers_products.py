@@ -1,5 +1,5 @@
 from typing import Optional
-from datetime import datetime, time  # ← add
+from datetime import date, datetime, time  # ← add
 from fastapi import APIRouter, Depends, Query, HTTPException
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import or_, and_, asc, desc
@@ -23,7 +23,7 @@ def _parse_date_bound(s: Optional[str], *, end: bool = False) -> Optional[dateti
         return None
     try:
         if len(s) == 10:  # "YYYY-MM-DD"
-            d = datetime.strptime(s, "%Y-%m-%d").date()
+            d = date.fromisoformat(s)  # C parser, no strptime
             return datetime.combine(d, time.max if end else time.min)
         return datetime.fromisoformat(s)  # ISO-8601
     except ValueError:
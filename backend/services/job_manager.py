@@ -32,7 +32,6 @@ class JobManager:
             run = models.JobRun(
                 job_id=job.id,
                 status="queued",
-                queued_at=datetime.utcnow(),
                 total=total or 0,
                 processed=0,
                 ok_count=0,
@@ -133,7 +132,6 @@ class JobManager:
 
             ev = models.JobEvent(
                 run_id=run.id,
-                ts=datetime.utcnow(),
                 level=(level or "info")[:10],
                 message=(note or "")[:400],
                 plus=inc_processed,
@@ -35,8 +35,8 @@ def _run_upsert_batch(db: Session, rows: list[dict]):
     set_map = {
         "type": func.coalesce(ex.type, models.Product.type) if "type" in present else models.Product.type,
         "category": func.coalesce(ex.category, models.Product.category) if "category" in present else models.Product.category,
-        "updated_at": func.now(),
-        "last_seen_at": func.now(),
+        "updated_at": models.utcnow(),
+        "last_seen_at": models.utcnow(),
     }
     if "price" in present:
         set_map["price"] = func.coalesce(ex.price, models.Product.price)
@@ -128,8 +128,8 @@ def upsert_product_urls(
 
     set_map = {
         "site_id": site.id,
-        "last_seen_at": func.now(),
-        "updated_at": func.now(),
+        "last_seen_at": models.utcnow(),
+        "updated_at": models.utcnow(),
     }
     if ptype:
         set_map["type"] = ptype
@@ -167,8 +167,8 @@ def upsert_product_items(db: Session, site_name: str, items: List[Dict[str, Any]
             "product_url": u,
             "type": it.get("type"),
             "category": it.get("category_name") or it.get("category"),
-            "last_seen_at": func.now(),
-            "updated_at": func.now(),
+            "last_seen_at": models.utcnow(),
+            "updated_at": models.utcnow(),
         }
         if price_norm is not None:
             row["price"] = price_norm
@@ -215,8 +215,8 @@ def upsert_product_details(db: Session, site_name: str, items: List[Dict[str, An
             "description": it.get("description") or None,
             "category": it.get("category") or None,
             "amazon_url": it.get("amazon_url") or None,
-            "updated_at": func.now(),
-            "last_seen_at": func.now(),
+            "updated_at": models.utcnow(),
+            "last_seen_at": models.utcnow(),
         }
         if price_norm is not None:
             row["price"] = price_norm
@@ -244,8 +244,8 @@ def upsert_product_details(db: Session, site_name: str, items: List[Dict[str, An
         "description": func.coalesce(ex.description, models.Product.description),
         "category": func.coalesce(ex.category, models.Product.category),
         "amazon_url": func.coalesce(ex.amazon_url, models.Product.amazon_url),
-        "updated_at": func.now(),
-        "last_seen_at": func.now(),
+        "updated_at": models.utcnow(),
+        "last_seen_at": models.utcnow(),
     }
     if any_has_price:
         set_map["price"] = func.coalesce(ex.price, models.Product.price)
@@ -284,8 +284,8 @@ def upsert_amazon_store_fields(db: Session, site_name: str, items: List[Dict[str
             "product_url": u,
             "amazon_store_name": it.get("amazon_store_name"),
             "amazon_store_url": it.get("amazon_store_url"),
-            "updated_at": func.now(),
-            "last_seen_at": func.now(),
+            "updated_at": models.utcnow(),
+            "last_seen_at": models.utcnow(),
         })
 
     if not rows:
@@ -299,8 +299,8 @@ def upsert_amazon_store_fields(db: Session, site_name: str, items: List[Dict[str
         set_={
             "amazon_store_name": func.coalesce(ex.amazon_store_name, models.Product.amazon_store_name),
             "amazon_store_url":  func.coalesce(ex.amazon_store_url,  models.Product.amazon_store_url),
-            "updated_at": func.now(),
-            "last_seen_at": func.now(),
+            "updated_at": models.utcnow(),
+            "last_seen_at": models.utcnow(),
         },
     )
     res = db.execute(stmt)
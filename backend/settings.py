@@ -9,6 +9,14 @@ class Settings(BaseSettings):
     jwt_secret: SecretStr = Field(..., validation_alias="JWT_SECRET")
     jwt_algorithm: str = Field("HS256", validation_alias="JWT_ALGORITHM")
     access_token_minutes: int = Field(180, validation_alias="ACCESS_TOKEN_MINUTES")
+    db_pool_size: int = Field(20, validation_alias="DB_POOL_SIZE")
+    db_max_overflow: int = Field(10, validation_alias="DB_MAX_OVERFLOW")
+    db_pool_timeout: int = Field(30, validation_alias="DB_POOL_TIMEOUT")      # seconds
+    db_pool_recycle: int = Field(1800, validation_alias="DB_POOL_RECYCLE")    # seconds
+    db_pool_pre_ping: bool = Field(False, validation_alias="DB_POOL_PRE_PING")  # TCP keepalives instead
+    # PgBouncer in transaction mode does the pooling itself: use NullPool, no pre-ping
+    db_behind_pgbouncer: bool = Field(False, validation_alias="DB_BEHIND_PGBOUNCER")
+    db_statement_timeout_ms: int = Field(30000, validation_alias="DB_STATEMENT_TIMEOUT_MS")  # 0 = off
     rebaid_categories_path: str | None = Field(None, validation_alias="REBAID_CATEGORIES_PATH")
     myvipon_categories_path: str | None = Field(None, validation_alias="MYVIPON_CATEGORIES_PATH")
     superuser_email: EmailStr | None = Field(None, validation_alias="SUPERUSER_EMAIL")
@@ -27,6 +35,9 @@ class Settings(BaseSettings):
     google_sheet_mode: str = Field(
         "append", validation_alias=AliasChoices("GOOGLE_SHEET_MODE", "google_sheet_mode")
     )
+    # gzip large Sheets request bodies (Content-Encoding: gzip)
+    sheets_gzip_requests: bool = Field(True, validation_alias="SHEETS_GZIP_REQUESTS")
+    sheets_max_rows: int = Field(200000, validation_alias="SHEETS_MAX_ROWS")  # 0 = no cap
     @field_validator("cors_origins", mode="before")
     @classmethod
     def _normalize_cors(cls, v):
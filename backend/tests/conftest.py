@@ -0,0 +1,64 @@
+# tests/conftest.py
+import hashlib
+import os
+import sys
+import tempfile
+
+# settings are read at import time: point the app at a throwaway SQLite file
+_DB_DIR = tempfile.mkdtemp(prefix="scraper-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_DB_DIR}/test.db")
+os.environ.setdefault("JWT_SECRET", "test-secret")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime, timedelta  # noqa: E402
+
+import pytest  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+import db as dbm  # noqa: E402
+import models  # noqa: E402
+from security import get_current_user  # noqa: E402
+
+# enough hard-to-compress text that even the .csv.gz body passes the 1 KiB gzip minimum
+N_PRODUCTS = 60
+
+
+@pytest.fixture(scope="session", autouse=True)
+def seeded_db():
+    dbm.Base.metadata.create_all(dbm.engine)
+    with dbm.SessionLocal() as s:
+        s.add_all([models.Site(id=1, name="rebaid"), models.Site(id=2, name="myvipon")])
+        base = datetime(2025, 1, 1)
+        for i in range(1, N_PRODUCTS + 1):
+            s.add(models.Product(
+                id=i, site_id=1 + i % 2, product_url=f"http://x/{i}",
+                title=hashlib.sha512(str(i).encode()).hexdigest(), last_seen_at=base + timedelta(minutes=i),
+            ))
+        s.commit()
+    yield N_PRODUCTS
+
+
+@pytest.fixture
+def exports_client():
+    from routers import exports
+
+    app = FastAPI()
+    app.include_router(exports.router)
+    app.dependency_overrides[get_current_user] = lambda: None
+    return TestClient(app)
+
+
+@pytest.fixture
+def gzip_exports_client():
+    """exports router behind the same gzip middleware setup as main.py."""
+    from middleware import SelectiveGZipMiddleware
+    from routers import exports
+
+    app = FastAPI()
+    app.include_router(exports.router)
+    app.dependency_overrides[get_current_user] = lambda: None
+    app.add_middleware(
+        SelectiveGZipMiddleware, skip=exports.is_gzip_download, minimum_size=1024, compresslevel=6
+    )
+    return TestClient(app)
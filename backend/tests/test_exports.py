@@ -0,0 +1,54 @@
+# tests/test_exports.py
+import csv
+import gzip
+import io
+
+import pytest
+
+
+def _rows(resp):
+    return list(csv.reader(io.StringIO(resp.content.decode("utf-8"))))
+
+
+def test_csv_exports_all_rows(exports_client, seeded_db):
+    r = exports_client.get("/exports/products.csv")
+    assert r.status_code == 200
+    assert len(_rows(r)) == seeded_db + 1
+
+
+def test_csv_ids_keep_input_order(exports_client):
+    r = exports_client.get("/exports/products.csv", params={"ids": "5, 3,5,9"})
+    assert r.status_code == 200
+    assert [row[0] for row in _rows(r)[1:]] == ["5", "3", "9"]
+
+
+@pytest.mark.parametrize("ids", ["", ",", " ", ",,", " , "])
+def test_csv_empty_ids_is_rejected(exports_client, ids):
+    # a present-but-empty id filter must not fall back to exporting the whole table
+    r = exports_client.get("/exports/products.csv", params={"ids": ids})
+    assert r.status_code == 400
+
+
+def test_csv_invalid_ids_is_rejected(exports_client):
+    r = exports_client.get("/exports/products.csv", params={"ids": "1,a"})
+    assert r.status_code == 400
+
+
+def test_plain_csv_is_gzipped_on_the_wire(gzip_exports_client):
+    r = gzip_exports_client.get("/exports/products.csv", headers={"Accept-Encoding": "gzip"})
+    assert r.status_code == 200
+    assert r.headers.get("content-encoding") == "gzip"
+
+
+def test_csv_gz_download_is_not_gzipped_twice(gzip_exports_client):
+    r = gzip_exports_client.get(
+        "/exports/products.csv",
+        params={"compress": "gzip"},
+        headers={"Accept-Encoding": "gzip"},
+    )
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/gzip"
+    assert "content-encoding" not in r.headers
+    assert r.headers["content-disposition"].endswith('.csv.gz"')
+    # exactly one gzip layer: the raw body unzips straight to CSV text
+    assert gzip.decompress(r.content).startswith(b"id,site_id,")
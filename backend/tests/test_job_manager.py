@@ -0,0 +1,89 @@
+# tests/test_job_manager.py
+import asyncio
+
+from jobs import manager as jm
+
+
+def _drain(q: asyncio.Queue) -> list:
+    out = []
+    while not q.empty():
+        out.append(q.get_nowait())
+    return out
+
+
+def test_coalesced_progress_is_flushed_at_deadline():
+    async def run():
+        m = jm.JobManager()
+        st = await m.create("t")
+        await m.mark_running(st.id)
+        q = m.queues[st.id]
+        _drain(q)
+        await m.tick(st.id, ok=True)                  # first tick goes out at once
+        for i in range(3):                            # held back (within N and T)
+            await m.tick(st.id, ok=False, note=f"url {i}: boom")
+        held = _drain(q)
+        await asyncio.sleep(jm.PROGRESS_EVERY_S + 0.1)  # no further ticks arrive
+        flushed = _drain(q)
+        await m.finish(st.id)
+        return held, flushed
+
+    held, flushed = asyncio.run(run())
+    assert [e["state"]["done"] for e in held] == [1]
+    assert len(flushed) == 1
+    state = flushed[0]["state"]
+    assert (state["done"], state["ok"], state["err"]) == (4, 1, 3)
+    assert state["note"] == "url 2: boom"              # latest note carried along
+
+
+def test_note_changes_do_not_defeat_coalescing():
+    async def run():
+        m = jm.JobManager()
+        st = await m.create("t")
+        await m.mark_running(st.id)
+        q = m.queues[st.id]
+        _drain(q)
+        for i in range(jm.PROGRESS_EVERY_N * 2):
+            await m.tick(st.id, ok=False, note=f"url {i}: boom")
+        events = _drain(q)
+        await m.finish(st.id)
+        return events
+
+    events = asyncio.run(run())
+    assert len(events) <= 3
+
+
+def test_stream_unregisters_queue_when_closed_early():
+    async def run():
+        m = jm.JobManager()
+        st = await m.create("t")
+        await m.mark_running(st.id)
+        events = m.stream(st.id)
+        first = await events.__anext__()
+        await events.aclose()                         # client went away mid-job
+        await m.tick(st.id, ok=True)                  # must not refill a dead queue
+        return first, st.id in m.queues
+
+    first, registered = asyncio.run(run())
+    assert first["type"] == "started"
+    assert not registered
+
+
+def test_stream_unregisters_queue_when_cancelled():
+    async def run():
+        m = jm.JobManager()
+        st = await m.create("t")
+
+        async def consume():
+            async for _ in m.stream(st.id):
+                pass
+
+        task = asyncio.create_task(consume())
+        await asyncio.sleep(0)                        # parked in q.get()
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        return st.id in m.queues
+
+    assert not asyncio.run(run())